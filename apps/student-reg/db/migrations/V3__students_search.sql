@@ -0,0 +1,62 @@
+-- Indexed, relevance-ranked search behind GET /students?q= and `admin_cli students search`.
+-- Leading-wildcard ILIKE can't use a btree, so every search used to be a seq scan.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Generated columns stay in sync on every INSERT/UPDATE without app changes.
+-- DOWNTIME: adding STORED columns rewrites the whole table under an ACCESS
+-- EXCLUSIVE lock, and the GIN builds below then block writes; every read and
+-- write of students waits until the migration commits, for a time that grows
+-- with the table. Run it in a maintenance window.
+ALTER TABLE students
+  ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', first_name || ' ' || last_name), 'A') ||
+    setweight(to_tsvector('simple', email::text), 'B') ||
+    setweight(to_tsvector('simple', coalesce(phone, '') || ' ' || coalesce(address, '')), 'C')
+  ) STORED,
+  ADD COLUMN IF NOT EXISTS search_text text GENERATED ALWAYS AS (
+    lower(
+      first_name || ' ' || last_name || ' ' || email::text || ' ' ||
+      coalesce(phone, '') || ' ' || coalesce(address, '')
+    )
+  ) STORED;
+
+-- Word/prefix matches (ranked)
+CREATE INDEX IF NOT EXISTS ix_students_search_vector
+  ON students USING gin (search_vector);
+
+-- Substring matches anywhere (emails, phone fragments, ...)
+CREATE INDEX IF NOT EXISTS ix_students_search_trgm
+  ON students USING gin (search_text gin_trgm_ops);
+
+-- 'ann smi' -> 'ann':* & 'smi':*  (every term, prefix match)
+CREATE OR REPLACE FUNCTION student_search_tsquery(q text)
+RETURNS tsquery
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+  SELECT to_tsquery('simple', string_agg(quote_literal(lexeme) || ':*', ' & '))
+  FROM unnest(to_tsvector('simple', q))
+$$;
+
+-- Substring LIKE pattern with the user's wildcards escaped
+CREATE OR REPLACE FUNCTION student_search_pattern(q text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+  SELECT '%' || replace(replace(replace(lower(btrim(q)), '\', '\\'), '%', '\%'), '_', '\_') || '%'
+$$;
+
+-- Shared search engine for the API and the admin CLI.
+-- Plain SQL + STABLE so the planner inlines it and both predicates hit the GIN indexes.
+-- Callers join back to students and ORDER BY rank DESC.
+CREATE OR REPLACE FUNCTION student_search(q text)
+RETURNS TABLE (student_id bigint, rank real)
+LANGUAGE sql STABLE PARALLEL SAFE
+AS $$
+  SELECT
+    s.id,
+    coalesce(ts_rank_cd(s.search_vector, student_search_tsquery(q)), 0)
+      + word_similarity(lower(btrim(q)), s.search_text)
+  FROM students s
+  WHERE s.search_vector @@ student_search_tsquery(q)
+     OR s.search_text LIKE student_search_pattern(q)
+$$;
@@ -0,0 +1,13 @@
+-- V3's generated columns are still NULL in NEW inside a BEFORE trigger, so the
+-- V2 check (NEW IS DISTINCT FROM OLD) was true for every UPDATE. Compare the
+-- stored content only.
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF (to_jsonb(NEW) - 'search_vector' - 'search_text')
+     IS DISTINCT FROM (to_jsonb(OLD) - 'search_vector' - 'search_text') THEN
+    NEW.updated_at = NOW();
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
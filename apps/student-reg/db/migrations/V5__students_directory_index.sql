@@ -0,0 +1,22 @@
+-- Sort key of the alphabetical directory (GET /students/directory). The V1
+-- (last_name, first_name) index matched no query; replace it so ordering,
+-- last-name prefixes and keyset pages are all ranges of this one index.
+-- lower(): case-insensitive order. COLLATE "C": byte order, so a prefix is
+-- the range [prefix, next prefix) with no locale rules.
+-- INCLUDE lets the per-letter counts run as index-only scans.
+
+-- CONCURRENTLY, so reads and writes carry on during the build. It can't run
+-- in a transaction: V5__students_directory_index.sql.conf turns Flyway's off,
+-- and each statement commits on its own. A failed build leaves an INVALID
+-- index behind; it is dropped first so a re-run (after flyway repair) starts
+-- clean.
+DROP INDEX CONCURRENTLY IF EXISTS ix_students_directory;
+
+CREATE INDEX CONCURRENTLY ix_students_directory ON students (
+  lower(last_name) COLLATE "C",
+  lower(first_name) COLLATE "C",
+  id
+) INCLUDE (last_name, first_name);
+
+-- Only once the new index is in place
+DROP INDEX CONCURRENTLY IF EXISTS ix_students_name;
@@ -0,0 +1,79 @@
+-- Change feed behind GET /students/changes and `admin_cli students watch`:
+-- every committed insert/update/delete of a student is NOTIFYed on
+-- student_changes, whoever wrote it (API, admin CLI, psql).
+-- Payload: {"op", "id", "updated_at", "resume", "student"}; "student" is the
+-- row without the generated search columns and change_xid, absent for
+-- deletes. NOTIFY is delivered on commit, and not at all on rollback.
+
+-- Resuming a feed can't go by updated_at: it is now() at transaction start,
+-- and a long transaction (e.g. a CSV import) commits rows older than changes
+-- already delivered. Instead every write records the id of its transaction,
+-- and each notification carries "resume", the xmin of a snapshot taken
+-- inside the writing transaction. Any transaction that commits later was
+-- still running then or started after, so its xid is >= that xmin: replaying
+-- rows with change_xid >= resume misses nothing (some arrive twice).
+ALTER TABLE students ADD COLUMN IF NOT EXISTS change_xid BIGINT;
+
+CREATE OR REPLACE FUNCTION set_change_xid()
+RETURNS TRIGGER AS $$
+BEGIN
+  -- Same content comparison as set_updated_at() (V4)
+  IF TG_OP = 'INSERT'
+     OR (to_jsonb(NEW) - 'search_vector' - 'search_text' - 'change_xid')
+        IS DISTINCT FROM (to_jsonb(OLD) - 'search_vector' - 'search_text' - 'change_xid') THEN
+    NEW.change_xid = pg_current_xact_id()::text::bigint;
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_students_set_change_xid ON students;
+
+CREATE TRIGGER trg_students_set_change_xid
+BEFORE INSERT OR UPDATE ON students
+FOR EACH ROW
+EXECUTE FUNCTION set_change_xid();
+
+CREATE OR REPLACE FUNCTION notify_student_change()
+RETURNS TRIGGER AS $$
+DECLARE
+  payload jsonb;
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    payload := jsonb_build_object('op', 'delete', 'id', OLD.id, 'updated_at', now());
+  ELSE
+    -- Not updated_at: a second UPDATE in the same transaction changes the row
+    -- but keeps now()
+    IF TG_OP = 'UPDATE'
+       AND (to_jsonb(NEW) - 'search_vector' - 'search_text')
+           IS NOT DISTINCT FROM (to_jsonb(OLD) - 'search_vector' - 'search_text') THEN
+      RETURN NULL;
+    END IF;
+    payload := jsonb_build_object(
+      'op', lower(TG_OP),
+      'id', NEW.id,
+      'updated_at', NEW.updated_at,
+      'student', to_jsonb(NEW) - 'search_vector' - 'search_text' - 'change_xid'
+    );
+  END IF;
+  payload := payload || jsonb_build_object(
+    'resume', pg_snapshot_xmin(pg_current_snapshot())::text::bigint
+  );
+  PERFORM pg_notify('student_changes', payload::text);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_students_notify_change ON students;
+
+CREATE TRIGGER trg_students_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON students
+FOR EACH ROW
+EXECUTE FUNCTION notify_student_change();
+
+-- Resuming replays rows by (change_xid, id); rows written before this
+-- migration have none and are only reachable through ?since=
+CREATE INDEX IF NOT EXISTS ix_students_change_xid ON students (change_xid, id);
+-- ?since= replays by (updated_at, id); also serves
+-- GET /students/export?updated_since=
+CREATE INDEX IF NOT EXISTS ix_students_updated_at ON students (updated_at, id);
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Compare two pytest-benchmark JSON files and fail on regressions.
+
+    python scripts/bench_compare.py base.json current.json --threshold 15
+
+Benchmarks are matched by full name. Exits 1 if any shared benchmark's
+median (or --stat) got slower by more than --threshold percent.
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path: str, stat: str) -> dict[str, float]:
+    with open(path) as f:
+        data = json.load(f)
+    return {b["fullname"]: b["stats"][stat] for b in data["benchmarks"]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("current")
+    parser.add_argument(
+        "--threshold", type=float, default=15.0, help="allowed slowdown in %%"
+    )
+    parser.add_argument(
+        "--stat", default="median", choices=["min", "median", "mean", "max"]
+    )
+    args = parser.parse_args()
+
+    base = load(args.base, args.stat)
+    current = load(args.current, args.stat)
+
+    regressions = 0
+    width = max((len(n) for n in current), default=10)
+    print(f"{'benchmark':<{width}}  {'base ms':>10}  {'now ms':>10}  {'change':>8}")
+    for name in sorted(current):
+        now = current[name]
+        if name not in base:
+            print(f"{name:<{width}}  {'-':>10}  {now * 1e3:>10.3f}  {'new':>8}")
+            continue
+        before = base[name]
+        change = (now - before) / before * 100
+        flag = ""
+        if change > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(
+            f"{name:<{width}}  {before * 1e3:>10.3f}  {now * 1e3:>10.3f}"
+            f"  {change:>+7.1f}%{flag}"
+        )
+    for name in sorted(set(base) - set(current)):
+        print(f"{name:<{width}}  {base[name] * 1e3:>10.3f}  {'-':>10}  {'gone':>8}")
+
+    if regressions:
+        print(
+            f"\n{regressions} benchmark(s) slower than {args.threshold:g}% on {args.stat}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
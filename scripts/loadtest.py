@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""HTTP load generator for the student-reg API.
+
+Drives a weighted mix of register/list/search/get/patch traffic, then
+reports throughput, latency percentiles, error rates and DB pool
+saturation scraped from /metrics. Writes a JSON report and can gate on a
+baseline report:
+
+    # against `docker compose up` (API on :8000)
+    python scripts/loadtest.py --duration 60 --concurrency 64 --out run.json
+    python scripts/loadtest.py --profile enrollment --rate 300 \\
+        --out new.json --baseline run.json --max-p99-regression 10
+
+--rate switches from closed-loop workers to an open-loop arrival rate, with
+latency measured from each request's scheduled start (no coordinated
+omission). Needs httpx (pip install -r src/requirements-dev.txt).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import httpx
+
+PROFILES = {
+    # Enrollment opening: mostly new registrations plus students checking in
+    "enrollment": {"register": 60, "get": 20, "list": 10, "search": 5, "patch": 5},
+    # Normal day: portal and roster reads, occasional admin edits
+    "browse": {"register": 5, "get": 45, "list": 25, "search": 20, "patch": 5},
+}
+SEARCH_TERMS = ["smith", "garcia", "mar", "chen", "ann", "lee", "kim", "road", "@"]
+SHED_STATUSES = (429, 503)
+
+
+@dataclass
+class OpStats:
+    latencies: list[float] = field(default_factory=list)
+    statuses: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    exceptions: int = 0
+
+    def summary(self, elapsed: float) -> dict:
+        # Every request, whatever its outcome, has one latency sample
+        lat = sorted(self.latencies)
+        total = len(lat)
+        errors = self.exceptions + sum(
+            n for s, n in self.statuses.items() if s >= 500 and s not in SHED_STATUSES
+        )
+        shed = sum(self.statuses.get(s, 0) for s in SHED_STATUSES)
+        return {
+            "requests": total,
+            "rps": total / elapsed if elapsed else 0.0,
+            "error_rate": errors / total if total else 0.0,
+            "shed_rate": shed / total if total else 0.0,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "exceptions": self.exceptions,
+            "latency_ms": {
+                "mean": sum(lat) / len(lat) * 1e3 if lat else None,
+                **{name: _pct(lat, q) for name, q in PERCENTILES},
+                "max": lat[-1] * 1e3 if lat else None,
+            },
+        }
+
+
+PERCENTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("p999", 0.999))
+
+
+def _pct(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    i = min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1)
+    return sorted_values[max(i, 0)] * 1e3
+
+
+class Workload:
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.admin = {"X-API-Key": args.api_key}
+        self.run_id = uuid.uuid4().hex[:8]
+        self.counter = 0
+        self.ids: list[int] = []
+        self.clients = [
+            f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+            for i in range(args.spoof_clients)
+        ]
+
+    def _headers(self) -> dict:
+        # Only honoured when the API trusts X-Forwarded-For (FORWARDED_ALLOW_IPS)
+        if self.clients:
+            return {"X-Forwarded-For": random.choice(self.clients)}
+        return {}
+
+    async def prepare(self) -> None:
+        r = await self.client.get("/students", params={"limit": 200})
+        r.raise_for_status()
+        self.ids = [s["id"] for s in r.json()]
+
+    async def register(self) -> int:
+        self.counter += 1
+        body = {
+            "first_name": "Load",
+            "last_name": "Test",
+            "email": f"load-{self.run_id}-{self.counter}@loadtest.example.com",
+        }
+        r = await self.client.post(
+            "/public/register", json=body, headers=self._headers()
+        )
+        if r.status_code == 201:
+            self.ids.append(r.json()["id"])
+        return r.status_code
+
+    async def list(self) -> int:
+        r = await self.client.get("/students", params={"limit": 50})
+        return r.status_code
+
+    async def search(self) -> int:
+        r = await self.client.get(
+            "/students", params={"q": random.choice(SEARCH_TERMS), "limit": 20}
+        )
+        return r.status_code
+
+    async def get(self) -> int:
+        if not self.ids:
+            return await self.list()
+        r = await self.client.get(f"/students/{random.choice(self.ids)}")
+        return r.status_code
+
+    async def patch(self) -> int:
+        if not self.ids:
+            return await self.list()
+        r = await self.client.patch(
+            f"/students/{random.choice(self.ids)}",
+            json={"age": random.randint(18, 60)},
+            headers=self.admin,
+        )
+        return r.status_code
+
+
+# -- /metrics scraping ---------------------------------------------------------
+
+_SAMPLE = re.compile(r"^([a-zA-Z_:][\w:]*)(\{[^}]*\})?\s+(\S+)$")
+
+
+def parse_metrics(text: str) -> dict[tuple[str, str], float]:
+    samples = {}
+    for line in text.splitlines():
+        m = _SAMPLE.match(line)
+        if m:
+            samples[(m.group(1), m.group(2) or "")] = float(m.group(3))
+    return samples
+
+
+def _label(labels: str, name: str) -> str | None:
+    m = re.search(rf'{name}="([^"]*)"', labels)
+    return m.group(1) if m else None
+
+
+class PoolSampler:
+    """Polls /metrics during the run for pool gauges, and diffs counters and
+    histograms between the first and last scrape."""
+
+    def __init__(self, client: httpx.AsyncClient, interval: float):
+        self.client = client
+        self.interval = interval
+        self.first: dict | None = None
+        self.last: dict | None = None
+        self.peaks: dict[str, dict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self.available = True
+
+    async def scrape(self) -> None:
+        try:
+            r = await self.client.get("/metrics")
+            r.raise_for_status()
+        except httpx.HTTPError:
+            self.available = False
+            return
+        samples = parse_metrics(r.text)
+        if self.first is None:
+            self.first = samples
+        self.last = samples
+        for (name, labels), value in samples.items():
+            if name in ("db_pool_checked_out", "db_pool_waiting", "db_pool_overflow"):
+                pool = _label(labels, "pool")
+                peak = self.peaks[pool]
+                peak[name] = max(peak[name], value)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            await self.scrape()
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except TimeoutError:
+                pass
+        await self.scrape()
+
+    def _delta(self, name: str) -> dict[str, float]:
+        out: dict[str, float] = defaultdict(float)
+        for (n, labels), value in (self.last or {}).items():
+            if n == name:
+                before = (self.first or {}).get((n, labels), 0.0)
+                out[labels] += value - before
+        return out
+
+    def summary(self) -> dict:
+        if not self.available or self.last is None:
+            return {"available": False}
+        pools = {}
+        for (name, labels), size in self.last.items():
+            if name != "db_pool_size":
+                continue
+            pool = _label(labels, "pool")
+            waits = self._delta("db_pool_checkout_wait_seconds_sum")
+            counts = self._delta("db_pool_checkout_wait_seconds_count")
+            key = f'{{pool="{pool}"}}'
+            n = counts.get(key, 0.0)
+            pools[pool] = {
+                "size": size,
+                "peak_checked_out": self.peaks[pool]["db_pool_checked_out"],
+                "peak_overflow": self.peaks[pool]["db_pool_overflow"],
+                "peak_waiting": self.peaks[pool]["db_pool_waiting"],
+                "checkouts": n,
+                "mean_checkout_wait_ms": waits.get(key, 0.0) / n * 1e3 if n else 0.0,
+                "checkout_wait_p99_ms": self._hist_p99(pool),
+            }
+        shed = {
+            _label(labels, "reason"): v
+            for labels, v in self._delta("admission_shed_total").items()
+            if v
+        }
+        return {"available": True, "pools": pools, "admission_shed": shed}
+
+    def _hist_p99(self, pool: str) -> float | None:
+        buckets = []
+        for labels, count in self._delta(
+            "db_pool_checkout_wait_seconds_bucket"
+        ).items():
+            if _label(labels, "pool") == pool:
+                le = _label(labels, "le")
+                buckets.append((math.inf if le == "+Inf" else float(le), count))
+        buckets.sort()
+        if not buckets or not buckets[-1][1]:
+            return None
+        target = 0.99 * buckets[-1][1]
+        for le, count in buckets:
+            if count >= target:
+                return le * 1e3 if le != math.inf else None
+        return None
+
+
+# -- drivers -------------------------------------------------------------------
+
+
+async def _timed(workload: Workload, op: str, stats, started: float) -> None:
+    # Failed requests (timeouts included) are timed too: leaving them out
+    # would hide exactly the slowest ones from the percentiles
+    try:
+        status = await getattr(workload, op)()
+    except httpx.HTTPError:
+        stats[op].exceptions += 1
+    else:
+        stats[op].statuses[status] += 1
+    stats[op].latencies.append(time.perf_counter() - started)
+
+
+async def closed_loop(workload, ops, weights, stats, args) -> None:
+    deadline = time.perf_counter() + args.duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            op = random.choices(ops, weights)[0]
+            await _timed(workload, op, stats, time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+
+async def open_loop(workload, ops, weights, stats, args) -> None:
+    # Latency counts from the scheduled start, so queueing in the client or
+    # server shows up instead of silently lowering the offered load
+    in_flight: set[asyncio.Task] = set()
+    limit = asyncio.Semaphore(args.concurrency)
+    start = time.perf_counter()
+    total = int(args.rate * args.duration)
+
+    async def fire(op, scheduled):
+        async with limit:
+            await _timed(workload, op, stats, scheduled)
+
+    for i in range(total):
+        scheduled = start + i / args.rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(fire(random.choices(ops, weights)[0], scheduled))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    await asyncio.gather(*in_flight)
+
+
+# -- reporting -----------------------------------------------------------------
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"\n{report['config']['mode']} run, {report['elapsed_s']:.1f}s, "
+        f"{report['total']['rps']:.1f} req/s, "
+        f"errors {report['total']['error_rate']:.2%}, "
+        f"shed {report['total']['shed_rate']:.2%}"
+    )
+    header = f"{'op':<10}{'reqs':>8}{'rps':>9}{'err%':>7}"
+    header += "".join(f"{n:>9}" for n, _ in PERCENTILES) + f"{'max':>9}"
+    print(header + "   (latency ms)")
+    for name, s in [*report["ops"].items(), ("TOTAL", report["total"])]:
+        lat = s["latency_ms"]
+        row = (
+            f"{name:<10}{s['requests']:>8}{s['rps']:>9.1f}{s['error_rate'] * 100:>7.2f}"
+        )
+        row += "".join(
+            f"{lat[n]:>9.1f}" if lat[n] is not None else f"{'-':>9}"
+            for n, _ in PERCENTILES
+        )
+        row += f"{lat['max']:>9.1f}" if lat["max"] is not None else f"{'-':>9}"
+        print(row)
+
+    pool = report["metrics"]
+    if not pool.get("available"):
+        print("\n/metrics not available; no pool data")
+        return
+    print("\nDB pool (peaks during run)")
+    for name, p in pool["pools"].items():
+        p99 = p["checkout_wait_p99_ms"]
+        print(
+            f"  {name:<16} size {p['size']:.0f}  checked out {p['peak_checked_out']:.0f}"
+            f"  overflow {p['peak_overflow']:.0f}  waiting {p['peak_waiting']:.0f}"
+            f"  wait mean {p['mean_checkout_wait_ms']:.2f}ms"
+            f"  p99 {'-' if p99 is None else f'<= {p99:g}ms'}"
+        )
+    if pool["admission_shed"]:
+        print(f"  admission shed: {pool['admission_shed']}")
+
+
+def compare(report: dict, baseline: dict, args) -> list[str]:
+    failures = []
+    for name, s in [*report["ops"].items(), ("TOTAL", report["total"])]:
+        base = baseline["total"] if name == "TOTAL" else baseline["ops"].get(name)
+        if not base:
+            continue
+        now_p99, base_p99 = s["latency_ms"]["p99"], base["latency_ms"]["p99"]
+        if now_p99 is not None and base_p99:
+            change = (now_p99 - base_p99) / base_p99 * 100
+            print(
+                f"  {name:<10} p99 {base_p99:8.1f} -> {now_p99:8.1f} ms ({change:+.1f}%)"
+            )
+            if change > args.max_p99_regression:
+                failures.append(f"{name}: p99 +{change:.1f}%")
+        if s["error_rate"] > base["error_rate"] + args.max_error_increase:
+            failures.append(
+                f"{name}: error rate {base['error_rate']:.2%} -> {s['error_rate']:.2%}"
+            )
+    return failures
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        op, _, weight = part.partition("=")
+        if op.strip() not in PROFILES["browse"]:
+            raise argparse.ArgumentTypeError(f"unknown op: {op}")
+        mix[op.strip()] = float(weight or 1)
+    return mix
+
+
+async def run(args) -> dict:
+    mix = args.mix or PROFILES[args.profile]
+    ops, weights = list(mix), list(mix.values())
+    stats: dict[str, OpStats] = defaultdict(OpStats)
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        workload = Workload(client, args)
+        await workload.prepare()
+        sampler = PoolSampler(client, args.scrape_interval)
+        await sampler.scrape()
+
+        stop = asyncio.Event()
+        sampling = asyncio.create_task(sampler.run(stop))
+        started = time.perf_counter()
+        if args.rate:
+            await open_loop(workload, ops, weights, stats, args)
+        else:
+            await closed_loop(workload, ops, weights, stats, args)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampling
+
+    total = OpStats()
+    for s in stats.values():
+        total.latencies += s.latencies
+        total.exceptions += s.exceptions
+        for k, v in s.statuses.items():
+            total.statuses[k] += v
+
+    report = {
+        "config": {
+            "base_url": args.base_url,
+            "mode": f"open-loop {args.rate}/s"
+            if args.rate
+            else f"closed-loop x{args.concurrency}",
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "mix": mix,
+        },
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "elapsed_s": elapsed,
+        "ops": {op: stats[op].summary(elapsed) for op in ops},
+        "total": total.summary(elapsed),
+        "metrics": sampler.summary(),
+    }
+    return report
+
+
+def main(args) -> int:
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nreport written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nvs baseline {args.baseline}")
+        failures = compare(report, baseline, args)
+        if failures:
+            print("REGRESSION: " + "; ".join(failures))
+            return 1
+        print("OK: no p99 or error-rate regression")
+    return 0
+
+
+def cli() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument(
+        "--base-url", default=os.getenv("LOADTEST_URL", "http://localhost:8000")
+    )
+    p.add_argument("--api-key", default=os.getenv("ADMIN_API_KEY", "change-me"))
+    p.add_argument("--profile", choices=sorted(PROFILES), default="enrollment")
+    p.add_argument(
+        "--mix", type=parse_mix, help="op weights, e.g. register=50,get=30,search=20"
+    )
+    p.add_argument("--duration", type=float, default=30.0, help="seconds")
+    p.add_argument(
+        "--concurrency",
+        type=int,
+        default=32,
+        help="workers, or max in flight with --rate",
+    )
+    p.add_argument("--rate", type=float, help="open-loop requests/second")
+    p.add_argument("--timeout", type=float, default=10.0)
+    p.add_argument("--scrape-interval", type=float, default=1.0)
+    p.add_argument(
+        "--spoof-clients",
+        type=int,
+        default=0,
+        help="spread registrations over N fake client IPs (X-Forwarded-For)",
+    )
+    p.add_argument("--out", help="write the JSON report here")
+    p.add_argument("--baseline", help="earlier report to gate against")
+    p.add_argument("--max-p99-regression", type=float, default=10.0, help="percent")
+    p.add_argument(
+        "--max-error-increase",
+        type=float,
+        default=0.001,
+        help="absolute error-rate delta",
+    )
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(main(cli()))
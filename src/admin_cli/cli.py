@@ -1,13 +1,26 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
 import typer
 from dotenv import load_dotenv
+from rich.progress import (
+    BarColumn,
+    DownloadColumn,
+    Progress,
+    TextColumn,
+    TimeRemainingColumn,
+)
 from rich.prompt import Confirm
 
 from .config import load_settings
-from .db import get_conn
+from .db import get_conn, query_log
 from . import students as students_mod
 from . import flyway as flyway_mod
 from . import health as health_mod
-from .util import console, render_table, render_kv
+from . import exporter as exporter_mod
+from . import importer as importer_mod
+from .util import console, cursor_values, encode_cursor, render_table, render_kv
 
 app = typer.Typer(no_args_is_help=True)
 students = typer.Typer(no_args_is_help=True)
@@ -18,9 +31,31 @@ app.add_typer(ops, name="ops")
 
 
 @app.callback()
-def main():
+def main(
+    ctx: typer.Context,
+    sql_stats: bool = typer.Option(
+        False, "--sql-stats", help="Print per-statement timings on exit"
+    ),
+):
     """Admin CLI: safe operational interface (CRUD + ops checks)."""
     load_dotenv()  # optional, loads .env if present
+    if sql_stats:
+        ctx.call_on_close(_print_sql_stats)
+
+
+def _print_sql_stats():
+    rows = [
+        {
+            "calls": s.calls,
+            "total_ms": f"{s.total * 1000:.1f}",
+            "max_ms": f"{s.slowest * 1000:.1f}",
+            "sql": sql if len(sql) <= 100 else sql[:97] + "...",
+        }
+        for sql, s in sorted(
+            query_log.stats.items(), key=lambda kv: kv[1].total, reverse=True
+        )
+    ]
+    render_table(rows[:20], "SQL statements (by total time)")
 
 
 # -----------------------
@@ -28,15 +63,48 @@ def main():
 # -----------------------
 
 
+def _cursor_id(token: str | None) -> int | None:
+    if token is None:
+        return None
+    try:
+        (value,) = cursor_values(token, id=int)
+    except ValueError:
+        console.print(f"[red]Invalid cursor: {token}[/red]")
+        raise typer.Exit(code=2)
+    return value
+
+
 @students.command("list")
 def students_list(
     limit: int = typer.Option(20, "--limit", "-l", help="Max rows to return"),
     offset: int = typer.Option(0, "--offset", "-o", help="Rows to skip"),
+    after: str | None = typer.Option(
+        None, "--after", help="Cursor: rows after this one (overrides --offset)"
+    ),
+    before: str | None = typer.Option(
+        None, "--before", help="Cursor: rows before this one (overrides --offset)"
+    ),
 ):
+    if after is not None and before is not None:
+        console.print("[red]Use either --after or --before.[/red]")
+        raise typer.Exit(code=2)
+
+    after_id, before_id = _cursor_id(after), _cursor_id(before)
     s = load_settings()
     with get_conn(s) as conn:
-        rows = students_mod.list_students(conn, limit, offset)
-    render_table(rows, f"Students (limit={limit}, offset={offset})")
+        rows = students_mod.list_students(conn, limit, offset, after_id, before_id)
+
+    if after is not None or before is not None:
+        title = f"Students (limit={limit}, after={after}, before={before})"
+    else:
+        title = f"Students (limit={limit}, offset={offset})"
+    render_table(rows, title)
+
+    if rows:
+        if len(rows) == limit or before_id is not None:
+            console.print(f"Next: --after {encode_cursor({'id': rows[-1]['id']})}")
+        if after_id is not None or (before_id is not None and len(rows) == limit):
+            console.print(f"Prev: --before {encode_cursor({'id': rows[0]['id']})}")
 
 
 @students.command("search")
@@ -52,11 +120,94 @@ def students_search(
 
 
 @students.command("get")
-def students_get(student_id: int = typer.Argument(..., help="Student ID")):
+def students_get(student_ids: list[int] = typer.Argument(..., help="Student ID(s)")):
+    s = load_settings()
+    if len(student_ids) == 1:
+        with get_conn(s) as conn:
+            row = students_mod.get_student(conn, student_ids[0])
+        render_kv(f"Student #{student_ids[0]}", row)
+        return
+
+    ids = list(dict.fromkeys(student_ids))
+    with get_conn(s) as conn:
+        rows = students_mod.get_students(conn, ids)
+    render_table(rows, f"Students ({len(rows)} of {len(ids)})")
+    found = {row["id"] for row in rows}
+    missing = [str(i) for i in ids if i not in found]
+    if missing:
+        console.print(f"[yellow]Not found: {', '.join(missing)}[/yellow]")
+
+
+def _print_change(change: dict, as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(change, default=datetime.isoformat), flush=True)
+        return
+    student = change.get("student") or {}
+    parts = [f"#{change['id']}", student.get("first_name"), student.get("last_name")]
+    if "email" in student:
+        parts.append(f"<{student['email']}>")
+    console.print(
+        f"{change['updated_at']}  [cyan]{change['op']:<6}[/cyan] "
+        + " ".join(p for p in parts if p)
+        + f"  [dim]resume {change['resume']}[/dim]"
+    )
+
+
+def _print_resync(as_json: bool) -> None:
+    # Same meaning as the API's resync event: deleted rows can't be replayed
+    if as_json:
+        print(json.dumps({"op": "resync", "reason": "resume"}), flush=True)
+        return
+    console.print(
+        "[yellow]Replaying; students deleted meanwhile are not shown[/yellow]"
+    )
+
+
+@students.command("watch")
+def students_watch(
+    since: datetime | None = typer.Option(
+        None, "--since", help="First print rows changed after this time"
+    ),
+    resume: int | None = typer.Option(
+        None,
+        "--resume",
+        min=0,
+        help="First print rows changed since the change with this resume token",
+    ),
+    as_json: bool = typer.Option(False, "--json", help="One JSON object per line"),
+):
+    """Follow student inserts/updates/deletes as they commit (Ctrl-C to stop).
+
+    Every change shows a resume token; pass the last one seen to --resume to
+    pick up where a previous watch stopped, however long the writing
+    transactions ran. Some rows may be printed twice.
+    """
+    if since is not None and resume is not None:
+        console.print("[red]Use either --since or --resume[/red]")
+        raise typer.Exit(code=2)
+
     s = load_settings()
     with get_conn(s) as conn:
-        row = students_mod.get_student(conn, student_id)
-    render_kv(f"Student #{student_id}", row)
+        conn.autocommit = True
+        # LISTEN before reading the backlog, so nothing falls in between;
+        # whatever commits from here on is at or above floor
+        students_mod.listen_changes(conn)
+        if since is not None or resume is not None:
+            floor = students_mod.resume_floor(conn)
+            _print_resync(as_json)
+            # The backlog is streamed off a named cursor, which needs one
+            with conn.transaction():
+                if resume is not None:
+                    rows = students_mod.changed_after(conn, resume)
+                else:
+                    rows = students_mod.changed_since(conn, since)
+                for row in rows:
+                    _print_change(students_mod.row_change(row, floor), as_json)
+        try:
+            for change in students_mod.watch_changes(conn):
+                _print_change(change, as_json)
+        except KeyboardInterrupt:
+            pass
 
 
 @students.command("create")
@@ -99,24 +250,23 @@ def students_update(
         False, "--dry-run", help="Don't write; only show what would happen"
     ),
 ):
+    patch = {}
+    if first_name is not None:
+        patch["first_name"] = first_name
+    if last_name is not None:
+        patch["last_name"] = last_name
+    if email is not None:
+        patch["email"] = email
+
     s = load_settings()
     with get_conn(s) as conn:
-        before = students_mod.get_student(conn, student_id)
-        if not before:
-            console.print("[red]Not found.[/red]")
-            raise typer.Exit(code=1)
-
         if dry_run:
-            console.print("[yellow]DRY RUN:[/yellow] would update student")
-
-            patch = {}
-            if first_name is not None:
-                patch["first_name"] = first_name
-            if last_name is not None:
-                patch["last_name"] = last_name
-            if email is not None:
-                patch["email"] = email
+            before = students_mod.get_student(conn, student_id)
+            if not before:
+                console.print("[red]Not found.[/red]")
+                raise typer.Exit(code=1)
 
+            console.print("[yellow]DRY RUN:[/yellow] would update student")
             if not patch:
                 console.print("[yellow]No changes provided.[/yellow]")
                 raise typer.Exit(code=0)
@@ -126,7 +276,7 @@ def students_update(
             raise typer.Exit(code=0)
 
         try:
-            after = students_mod.update_student(
+            result = students_mod.update_student(
                 conn, student_id, first_name, last_name, email
             )
             conn.commit()
@@ -134,6 +284,11 @@ def students_update(
             console.print(f"[red]{e}[/red]")
             raise typer.Exit(code=1)
 
+    if result is None:
+        console.print("[red]Not found.[/red]")
+        raise typer.Exit(code=1)
+
+    before, after = result
     render_kv("Before", before)
     render_kv("After", after)
 
@@ -145,12 +300,14 @@ def students_delete(
 ):
     s = load_settings()
     with get_conn(s) as conn:
-        row = students_mod.get_student(conn, student_id)
-        if not row:
-            console.print("[red]Not found.[/red]")
-            raise typer.Exit(code=1)
-
+        # The prompt needs the row; with --yes the DELETE alone says whether
+        # it existed
         if not yes:
+            row = students_mod.get_student(conn, student_id)
+            if not row:
+                console.print("[red]Not found.[/red]")
+                raise typer.Exit(code=1)
+
             ok = Confirm.ask(f"Delete student #{student_id} ({row.get('email')})?")
             if not ok:
                 console.print("[yellow]Cancelled.[/yellow]")
@@ -159,13 +316,123 @@ def students_delete(
         deleted = students_mod.delete_student(conn, student_id)
         conn.commit()
 
-    if deleted == 1:
+    if deleted:
         console.print("[green]Deleted.[/green]")
     else:
-        console.print("[red]Delete failed.[/red]")
+        console.print("[red]Not found.[/red]")
         raise typer.Exit(code=1)
 
 
+@students.command("import")
+def students_import(
+    path: Path = typer.Argument(
+        ..., exists=True, dir_okay=False, readable=True, help="CSV file with header"
+    ),
+    batch_size: int = typer.Option(
+        50_000, "--batch-size", "-b", min=1, help="Rows per COPY + merge + commit"
+    ),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", help="Only validate the file; don't touch the DB"
+    ),
+):
+    """Bulk-load students from CSV (first_name,last_name,email[,phone,age,address])."""
+    progress = Progress(
+        TextColumn("[bold]{task.description}"),
+        BarColumn(),
+        DownloadColumn(),
+        TimeRemainingColumn(),
+        TextColumn("{task.fields[status]}"),
+        console=console,
+    )
+    description = "Validating" if dry_run else "Importing"
+
+    with progress:
+        task = progress.add_task(description, status="")
+
+        def on_batch(summary):
+            progress.update(
+                task,
+                status=f"inserted={summary.inserted} skipped={summary.skipped} "
+                f"rejected={summary.rejected}",
+            )
+
+        with progress.open(path, "r", encoding="utf-8", newline="", task_id=task) as f:
+            try:
+                if dry_run:
+                    summary = importer_mod.validate_csv(f)
+                else:
+                    s = load_settings()
+                    with get_conn(s) as conn:
+                        summary = importer_mod.import_csv(
+                            conn, f, batch_size, on_batch=on_batch
+                        )
+            except ValueError as e:
+                console.print(f"[red]{e}[/red]")
+                raise typer.Exit(code=1)
+
+    if dry_run:
+        console.print("[yellow]DRY RUN:[/yellow] nothing was written")
+        summary_dict = {
+            "read": summary.read,
+            "valid": summary.read - summary.rejected,
+            "rejected": summary.rejected,
+        }
+    else:
+        summary_dict = summary.as_dict()
+    render_kv("Import Summary", summary_dict)
+
+    if summary.rejections:
+        render_table(
+            [{"line": n, "reason": reason} for n, reason in summary.rejections],
+            f"Rejected rows (first {len(summary.rejections)})",
+        )
+
+
+@students.command("export")
+def students_export(
+    out: Path = typer.Option(..., "--out", help="Destination file"),
+    fmt: str = typer.Option("csv", "--format", "-f", help="csv | ndjson | parquet"),
+    created_since: datetime | None = typer.Option(
+        None, "--created-since", help="Only rows with created_at >= this"
+    ),
+    created_until: datetime | None = typer.Option(
+        None, "--created-until", help="Only rows with created_at < this"
+    ),
+    updated_since: datetime | None = typer.Option(
+        None, "--updated-since", help="Only rows with updated_at >= this"
+    ),
+    updated_until: datetime | None = typer.Option(
+        None, "--updated-until", help="Only rows with updated_at < this"
+    ),
+    batch_size: int = typer.Option(
+        10_000, "--batch-size", "-b", min=1, help="Rows fetched per round trip"
+    ),
+):
+    """Stream a students snapshot to disk in bounded memory."""
+    if fmt not in exporter_mod.FORMATS:
+        console.print(f"[red]Unknown format: {fmt}[/red]")
+        raise typer.Exit(code=2)
+
+    filters = {
+        "created_since": created_since,
+        "created_until": created_until,
+        "updated_since": updated_since,
+        "updated_until": updated_until,
+    }
+    s = load_settings()
+    with get_conn(s) as conn:
+        with console.status(f"Exporting to {out} ..."):
+            try:
+                count = exporter_mod.export_students(
+                    conn, fmt, out, filters, batch_size
+                )
+            except ValueError as e:
+                console.print(f"[red]{e}[/red]")
+                raise typer.Exit(code=1)
+
+    render_kv("Exported", {"rows": count, "format": fmt, "path": str(out)})
+
+
 # -----------------------
 # Ops commands
 # -----------------------
@@ -15,6 +15,8 @@ class Settings:
     db_user: str
     db_password: str = field(repr=False)  # <-- hides password in print/repr
     db_sslmode: str = "prefer"
+    # Statements slower than this are logged to stderr (0 disables)
+    db_slow_query_ms: float = 250.0
 
 
 def load_settings() -> Settings:
@@ -25,4 +27,5 @@ def load_settings() -> Settings:
         db_user=os.getenv("DB_USER", "app_user"),
         db_password=os.getenv("DB_PASSWORD", ""),
         db_sslmode=os.getenv("DB_SSLMODE", "prefer"),
+        db_slow_query_ms=float(os.getenv("DB_SLOW_QUERY_MS", "250")),
     )
@@ -1,8 +1,97 @@
+import hashlib
+import json
+import logging
+import re
+import time
 from contextlib import contextmanager
+from dataclasses import dataclass, field
+
 import psycopg
 from psycopg.rows import dict_row
 from .config import Settings
 
+log = logging.getLogger("admin_cli.sql")
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%\(\w+\)s|%s"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\s+"), " "),
+    (re.compile(r"\(\?(?:, \?)+\)"), "(?, ...)"),
+]
+
+
+def normalize(sql: str) -> str:
+    """SQL with literals and placeholders replaced by ``?``."""
+    text = sql.strip()
+    for pattern, repl in _LITERALS:
+        text = pattern.sub(repl, text)
+    return text
+
+
+@dataclass
+class StatementStats:
+    calls: int = 0
+    total: float = 0.0
+    slowest: float = 0.0
+
+
+@dataclass
+class QueryLog:
+    """Timings for every statement run through get_conn() connections.
+
+    Statements over ``slow_ms`` are logged as JSON on the ``admin_cli.sql``
+    logger (stderr unless configured otherwise); ``stats`` (keyed by normalized SQL) backs ``--sql-stats``.
+    """
+
+    slow_ms: float = 250.0
+    stats: dict[str, StatementStats] = field(default_factory=dict)
+
+    def record(self, query, elapsed: float, rowcount: int, conn) -> None:
+        sql = query if isinstance(query, str) else query.as_string(conn)
+        text = normalize(sql)
+        s = self.stats.setdefault(text, StatementStats())
+        s.calls += 1
+        s.total += elapsed
+        s.slowest = max(s.slowest, elapsed)
+        if 0 < self.slow_ms <= elapsed * 1000:
+            record = {
+                "duration_ms": round(elapsed * 1000, 2),
+                "fingerprint": hashlib.sha1(text.encode()).hexdigest()[:8],
+                "rowcount": rowcount,
+                "sql": text[:2000],
+            }
+            log.warning("slow query %s", json.dumps(record))
+
+
+query_log = QueryLog()
+
+
+class _Clock:
+    """Adds the time spent inside each ``with`` block to ``total``."""
+
+    def __init__(self):
+        self.total = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.total += time.perf_counter() - self._started
+
+
+class TimedCursor(psycopg.Cursor):
+    """Client cursor that reports each execute() to ``query_log``."""
+
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            query_log.record(
+                query, time.perf_counter() - started, self.rowcount, self.connection
+            )
+
 
 def dsn(s: Settings) -> str:
     return (
@@ -13,7 +102,8 @@ def dsn(s: Settings) -> str:
 
 @contextmanager
 def get_conn(s: Settings):
-    conn = psycopg.connect(dsn(s), row_factory=dict_row)
+    query_log.slow_ms = s.db_slow_query_ms
+    conn = psycopg.connect(dsn(s), row_factory=dict_row, cursor_factory=TimedCursor)
     try:
         yield conn
     finally:
@@ -36,3 +126,47 @@ def execute(conn, sql: str, params: dict | None = None) -> int:
     with conn.cursor() as cur:
         cur.execute(sql, params or {})
         return cur.rowcount
+
+
+def stream_all(conn, sql: str, params: dict | None = None, itersize: int = 10_000):
+    """Yield rows from a named (server-side) cursor, ``itersize`` at a time.
+
+    Unlike fetch_all, memory stays bounded regardless of result size. Needs a
+    transaction, so don't use it on an autocommit connection. Reported to
+    ``query_log`` once exhausted or closed, timing only the server round trips
+    (not the caller's work between batches).
+    """
+    clock, rows = _Clock(), 0
+    with conn.cursor(name="admin_cli_stream") as cur:
+        try:
+            with clock:
+                cur.execute(sql, params or {})
+            while True:
+                with clock:
+                    batch = cur.fetchmany(itersize)
+                if not batch:
+                    break
+                rows += len(batch)
+                yield from batch
+        finally:
+            query_log.record(sql, clock.total, rows, conn)
+
+
+def copy_to(conn, sql: str, out, params: dict | None = None) -> int:
+    """Run ``COPY (...) TO STDOUT`` and write the raw chunks to ``out``.
+
+    Returns the number of rows copied. Timed into ``query_log`` like
+    stream_all, without the writes to ``out``.
+    """
+    writing = _Clock()
+    started = time.perf_counter()
+    with conn.cursor() as cur:
+        try:
+            with cur.copy(sql, params or {}) as copy:
+                for chunk in copy:
+                    with writing:
+                        out.write(chunk)
+        finally:
+            elapsed = time.perf_counter() - started - writing.total
+            query_log.record(sql, elapsed, cur.rowcount, conn)
+        return cur.rowcount
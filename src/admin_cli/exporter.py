@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import os
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+from .db import copy_to, stream_all
+
+EXPORT_COLUMNS = (
+    "id",
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "age",
+    "address",
+    "created_at",
+    "updated_at",
+)
+FORMATS = ("csv", "ndjson", "parquet")
+
+# Column -> filter option, e.g. updated_at >= --updated-since
+FILTERS = {
+    "created_since": ("created_at", ">="),
+    "created_until": ("created_at", "<"),
+    "updated_since": ("updated_at", ">="),
+    "updated_until": ("updated_at", "<"),
+}
+
+
+def build_query(filters: dict[str, Optional[datetime]]) -> tuple[str, dict]:
+    where = []
+    params = {}
+    for name, value in filters.items():
+        if value is None:
+            continue
+        column, op = FILTERS[name]
+        where.append(f"{column} {op} %({name})s")
+        params[name] = value
+
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM students"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY id", params
+
+
+@contextmanager
+def _atomic_output(path: Path, mode: str):
+    # Downstream jobs never see a half-written snapshot
+    tmp = path.with_name(path.name + ".part")
+    try:
+        with open(tmp, mode) as f:
+            yield f
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def export_csv(conn, path: Path, sql: str, params: dict) -> int:
+    with _atomic_output(path, "wb") as f:
+        return copy_to(
+            conn, f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", f, params
+        )
+
+
+def export_ndjson(conn, path: Path, sql: str, params: dict, batch_size: int) -> int:
+    count = 0
+    with _atomic_output(path, "w") as f:
+        for row in stream_all(conn, sql, params, itersize=batch_size):
+            f.write(json.dumps(row, default=_json_default))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def export_parquet(conn, path: Path, sql: str, params: dict, batch_size: int) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export needs pyarrow: pip install pyarrow")
+
+    ts = pa.timestamp("us", tz="UTC")
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("first_name", pa.string()),
+            ("last_name", pa.string()),
+            ("email", pa.string()),
+            ("phone", pa.string()),
+            ("age", pa.int32()),
+            ("address", pa.string()),
+            ("created_at", ts),
+            ("updated_at", ts),
+        ]
+    )
+
+    count = 0
+    batch: list[dict] = []
+    with _atomic_output(path, "wb") as f:
+        with pq.ParquetWriter(f, schema) as writer:
+            for row in stream_all(conn, sql, params, itersize=batch_size):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    writer.write_batch(pa.RecordBatch.from_pylist(batch, schema))
+                    count += len(batch)
+                    batch.clear()
+            if batch:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema))
+                count += len(batch)
+    return count
+
+
+def export_students(
+    conn,
+    fmt: str,
+    path: Path,
+    filters: dict[str, Optional[datetime]],
+    batch_size: int = 10_000,
+) -> int:
+    """Stream a (filtered) students snapshot to ``path``; returns rows written."""
+    sql, params = build_query(filters)
+    if fmt == "csv":
+        return export_csv(conn, path, sql, params)
+    if fmt == "ndjson":
+        return export_ndjson(conn, path, sql, params, batch_size)
+    if fmt == "parquet":
+        return export_parquet(conn, path, sql, params, batch_size)
+    raise ValueError(f"Unknown format: {fmt} (expected one of {', '.join(FORMATS)})")
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from .students import _norm_email, _norm_text
+
+REQUIRED_COLUMNS = ("first_name", "last_name", "email")
+OPTIONAL_COLUMNS = ("phone", "age", "address")
+COLUMNS = REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+
+# Same limits as the API's StudentCreate schema, in COLUMNS order (age is checked
+# separately)
+MAX_LEN = (80, 80, 255, 32, None, 255)
+MAX_REJECTIONS_KEPT = 20
+
+
+@dataclass
+class ImportSummary:
+    read: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    rejected: int = 0
+    # (line number, reason) for the first few rejected rows
+    rejections: list[tuple[int, str]] = field(default_factory=list)
+
+    def reject(self, line_no: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.rejections) < MAX_REJECTIONS_KEPT:
+            self.rejections.append((line_no, reason))
+
+    def as_dict(self) -> dict:
+        return {
+            "read": self.read,
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "rejected": self.rejected,
+        }
+
+
+def column_positions(header: Optional[list[str]]) -> list[Optional[int]]:
+    """Map COLUMNS to their index in the CSV header (None if absent)."""
+    header = [h.strip() for h in header or ()]
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"CSV header is missing column(s): {', '.join(missing)}")
+    return [header.index(c) if c in header else None for c in COLUMNS]
+
+
+def normalize_row(values: list[Optional[str]]) -> tuple:
+    """Apply the CLI's _norm_text/_norm_email rules and the API's limits.
+
+    ``values`` are the raw cells in COLUMNS order. Returns the cleaned row as a
+    tuple in the same order, or raises ValueError with a readable reason.
+    """
+    first, last, email, phone, age, address = values
+    row = [
+        _norm_text(first),
+        _norm_text(last),
+        _norm_email(email),
+        _norm_text(phone),
+        _norm_text(age),
+        _norm_text(address),
+    ]
+
+    for col, value in zip(REQUIRED_COLUMNS, row):
+        if value is None:
+            raise ValueError(f"{col} is required")
+    for col, value, limit in zip(COLUMNS, row, MAX_LEN):
+        if limit is not None and value is not None and len(value) > limit:
+            raise ValueError(f"{col} longer than {limit} characters")
+
+    local, _, domain = row[2].partition("@")
+    if not local or "." not in domain:
+        raise ValueError(f"invalid email: {row[2]}")
+
+    if row[4] is not None:
+        try:
+            row[4] = int(row[4])
+        except ValueError:
+            raise ValueError(f"age is not a number: {row[4]}")
+        if not 0 <= row[4] <= 130:
+            raise ValueError(f"age out of range: {row[4]}")
+
+    return tuple(row)
+
+
+def iter_valid_rows(f, summary: ImportSummary) -> Iterator[tuple[int, tuple]]:
+    """Stream (line number, normalized row) from an open CSV file.
+
+    Rows that fail validation are counted on ``summary`` and skipped; nothing
+    is held in memory beyond the current row.
+    """
+    reader = csv.reader(f)
+    positions = column_positions(next(reader, None))
+    for cells in reader:
+        if not cells:
+            continue
+        summary.read += 1
+        values = [
+            cells[i] if i is not None and i < len(cells) else None for i in positions
+        ]
+        try:
+            yield reader.line_num, normalize_row(values)
+        except ValueError as e:
+            summary.reject(reader.line_num, str(e))
+
+
+def validate_csv(f) -> ImportSummary:
+    """Dry run: validate every row without touching the database."""
+    summary = ImportSummary()
+    for _ in iter_valid_rows(f, summary):
+        pass
+    return summary
+
+
+def import_csv(conn, f, batch_size: int, on_batch=None) -> ImportSummary:
+    """COPY rows into a session-local staging table and merge in batches.
+
+    Each batch is one COPY, one INSERT ... SELECT ... ON CONFLICT (email) DO
+    NOTHING and one commit, so a failure only loses the batch in flight.
+    Duplicate emails (already in the table or repeated in the file) are
+    counted as skipped; the first occurrence in the file wins.
+    """
+    summary = ImportSummary()
+    cols = ", ".join(COLUMNS)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS students_import (
+              line_no    bigint,
+              first_name text,
+              last_name  text,
+              email      text,
+              phone      text,
+              age        integer,
+              address    text
+            ) ON COMMIT DELETE ROWS
+            """
+        )
+
+        rows = iter_valid_rows(f, summary)
+        exhausted = False
+        while not exhausted:
+            staged = 0
+            with cur.copy(f"COPY students_import (line_no, {cols}) FROM STDIN") as copy:
+                for line_no, row in rows:
+                    copy.write_row((line_no, *row))
+                    staged += 1
+                    if staged >= batch_size:
+                        break
+                else:
+                    exhausted = True
+
+            if staged:
+                cur.execute(
+                    f"""
+                    INSERT INTO students ({cols})
+                    SELECT DISTINCT ON (email) {cols}
+                    FROM students_import
+                    ORDER BY email, line_no
+                    ON CONFLICT (email) DO NOTHING
+                    """
+                )
+                summary.inserted += cur.rowcount
+                summary.skipped += staged - cur.rowcount
+            conn.commit()
+
+            if on_batch is not None:
+                on_batch(summary)
+
+    return summary
@@ -1,10 +1,31 @@
 from __future__ import annotations
 
+import json
+from collections.abc import Iterator
+from datetime import datetime
 from typing import Optional
 
 from psycopg.errors import UniqueViolation
 
-from .db import fetch_all, fetch_one, execute
+from .db import execute, fetch_all, fetch_one, stream_all
+
+
+# Must match app.services.student_service.CACHE_CHANNEL: API pods drop the
+# notified ids from their in-process cache
+CACHE_CHANNEL = "student_cache_invalidate"
+
+# Must match app.services.change_feed.CHANNEL: the V6 trigger NOTIFYs every
+# committed insert/update/delete here
+CHANGES_CHANNEL = "student_changes"
+
+
+def notify_changed(conn, student_id: int) -> None:
+    """Queue a cache invalidation; it is delivered when the caller commits."""
+    fetch_one(
+        conn,
+        "SELECT pg_notify(%(channel)s, %(id)s)",
+        {"channel": CACHE_CHANNEL, "id": str(student_id)},
+    )
 
 
 def _norm_text(s: Optional[str]) -> Optional[str]:
@@ -21,13 +42,48 @@ def _norm_email(email: Optional[str]) -> Optional[str]:
     return email.lower()
 
 
-def list_students(conn, limit: int, offset: int):
+def list_students(
+    conn,
+    limit: int,
+    offset: int,
+    after: Optional[int] = None,
+    before: Optional[int] = None,
+):
+    # Newest first, like GET /students, so cursors work with either. Keyset
+    # bounds seek via the primary key instead of scanning skipped rows.
+    if after is not None:
+        return fetch_all(
+            conn,
+            """
+            SELECT id, first_name, last_name, email, created_at, updated_at
+            FROM students
+            WHERE id < %(after)s
+            ORDER BY id DESC
+            LIMIT %(limit)s
+            """,
+            {"after": after, "limit": limit},
+        )
+    if before is not None:
+        rows = fetch_all(
+            conn,
+            """
+            SELECT id, first_name, last_name, email, created_at, updated_at
+            FROM students
+            WHERE id > %(before)s
+            ORDER BY id
+            LIMIT %(limit)s
+            """,
+            {"before": before, "limit": limit},
+        )
+        rows.reverse()
+        return rows
+
     return fetch_all(
         conn,
         """
         SELECT id, first_name, last_name, email, created_at, updated_at
         FROM students
-        ORDER BY id
+        ORDER BY id DESC
         LIMIT %(limit)s OFFSET %(offset)s
         """,
         {"limit": limit, "offset": offset},
@@ -35,19 +91,18 @@ def list_students(conn, limit: int, offset: int):
 
 
 def search_students(conn, q: str, limit: int, offset: int):
-    like = f"%{q}%"
+    # Same ranked, index-backed search the API uses (student_search() from V3)
     return fetch_all(
         conn,
         """
-        SELECT id, first_name, last_name, email, created_at, updated_at
-        FROM students
-        WHERE first_name ILIKE %(like)s
-           OR last_name  ILIKE %(like)s
-           OR email      ILIKE %(like)s
-        ORDER BY id
+        SELECT s.id, s.first_name, s.last_name, s.email, s.created_at, s.updated_at,
+               round(hits.rank::numeric, 3) AS rank
+        FROM student_search(%(q)s) AS hits
+        JOIN students s ON s.id = hits.student_id
+        ORDER BY hits.rank DESC, s.id
         LIMIT %(limit)s OFFSET %(offset)s
         """,
-        {"like": like, "limit": limit, "offset": offset},
+        {"q": q.strip(), "limit": limit, "offset": offset},
     )
 
 
@@ -63,25 +118,111 @@ def get_student(conn, student_id: int):
     )
 
 
+def get_students(conn, ids: list[int]):
+    # One round trip for any number of ids; rows come back in ``ids`` order
+    rows = fetch_all(
+        conn,
+        """
+        SELECT id, first_name, last_name, email, created_at, updated_at
+        FROM students
+        WHERE id = ANY(%(ids)s)
+        """,
+        {"ids": ids},
+    )
+    by_id = {row["id"]: row for row in rows}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def listen_changes(conn) -> None:
+    """LISTEN for change notifications; ``conn`` must be in autocommit."""
+    execute(conn, f"LISTEN {CHANGES_CHANNEL}")
+
+
+def resume_floor(conn) -> int:
+    """The xmin of a fresh snapshot: every transaction that commits from now
+    on has change_xid >= this (see V6), so it is a safe resume token for
+    anything not yet seen."""
+    row = fetch_one(
+        conn, "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint AS xmin"
+    )
+    return row["xmin"]
+
+
+def changed_after(conn, resume: int) -> Iterator[dict]:
+    """Rows written by transactions from the resume token on, in (change_xid,
+    id) order: a range of ix_students_change_xid (V6). Streamed, so needs a
+    transaction. Deleted rows cannot be replayed."""
+    return stream_all(
+        conn,
+        """
+        SELECT id, first_name, last_name, email, created_at, updated_at,
+               change_xid
+        FROM students
+        WHERE (change_xid, id) > (%(resume)s, 0)
+        ORDER BY change_xid, id
+        """,
+        {"resume": resume},
+    )
+
+
+def changed_since(conn, since: datetime) -> Iterator[dict]:
+    """Rows updated after ``since``, oldest first: a range of
+    ix_students_updated_at (V6). Streamed, so needs a transaction. Deleted
+    rows cannot be replayed."""
+    return stream_all(
+        conn,
+        """
+        SELECT id, first_name, last_name, email, created_at, updated_at,
+               change_xid
+        FROM students
+        WHERE updated_at > %(since)s
+        ORDER BY updated_at, id
+        """,
+        {"since": since},
+    )
+
+
+def row_change(row: dict, floor: int) -> dict:
+    """A replayed row as a change, shaped like the NOTIFY payloads. The op is
+    inferred, and the resume token is the lower of the row's change_xid and
+    ``floor``: notifications queued during the replay may be older."""
+    student = dict(row)
+    change_xid = student.pop("change_xid")
+    return {
+        "op": "insert" if row["created_at"] == row["updated_at"] else "update",
+        "id": row["id"],
+        "updated_at": row["updated_at"].isoformat(),
+        "resume": floor if change_xid is None else min(change_xid, floor),
+        "student": student,
+    }
+
+
+def watch_changes(conn) -> Iterator[dict]:
+    """Decoded notifications, as they arrive, until interrupted."""
+    for notify in conn.notifies():
+        yield json.loads(notify.payload)
+
+
 def create_student(conn, first_name: str, last_name: str, email: str):
     first_name = _norm_text(first_name) or ""
     last_name = _norm_text(last_name) or ""
     email = _norm_email(email) or ""
 
-    try:
-        row = fetch_one(
-            conn,
-            """
-            INSERT INTO students(first_name, last_name, email)
-            VALUES (%(first)s, %(last)s, %(email)s)
-            RETURNING id, first_name, last_name, email, created_at, updated_at
-            """,
-            {"first": first_name, "last": last_name, "email": email},
-        )
-        return row
-    except UniqueViolation as e:
-        # Friendly error for duplicate email if you have UNIQUE(email)
-        raise ValueError(f"Email already exists: {email}") from e
+    # Same single statement as the API: no row back means the email is taken,
+    # and the transaction stays usable (no UniqueViolation to roll back)
+    row = fetch_one(
+        conn,
+        """
+        INSERT INTO students(first_name, last_name, email)
+        VALUES (%(first)s, %(last)s, %(email)s)
+        ON CONFLICT (email) DO NOTHING
+        RETURNING id, first_name, last_name, email, created_at, updated_at
+        """,
+        {"first": first_name, "last": last_name, "email": email},
+    )
+    if row is None:
+        raise ValueError(f"Email already exists: {email}")
+    return row
 
 
 def update_student(
@@ -91,6 +232,12 @@ def update_student(
     last_name: Optional[str],
     email: Optional[str],
 ):
+    """Apply the patch in one UPDATE ... RETURNING.
+
+    Returns ``(before, after)`` rows, or ``None`` if the student doesn't exist.
+    The old values come from a locked self-join in the same statement, so the
+    CLI can still show a before/after diff without a separate SELECT.
+    """
     # Normalize inputs
     first_name = _norm_text(first_name)
     last_name = _norm_text(last_name)
@@ -99,26 +246,56 @@ def update_student(
     # No-op guard (optional but nice)
     if first_name is None and last_name is None and email is None:
         # Caller (CLI) already guards this in dry-run, but keep it safe here too.
-        return get_student(conn, student_id)
+        row = get_student(conn, student_id)
+        return (row, row) if row else None
 
     try:
         row = fetch_one(
             conn,
             """
-            UPDATE students
+            UPDATE students s
             SET
-              first_name = COALESCE(%(first)s, first_name),
-              last_name  = COALESCE(%(last)s, last_name),
-              email      = COALESCE(%(email)s, email)
-            WHERE id = %(id)s
-            RETURNING id, first_name, last_name, email, created_at, updated_at
+              first_name = COALESCE(%(first)s, s.first_name),
+              last_name  = COALESCE(%(last)s, s.last_name),
+              email      = COALESCE(%(email)s, s.email)
+            FROM (
+              SELECT id, first_name, last_name, email, created_at, updated_at
+              FROM students
+              WHERE id = %(id)s
+              FOR UPDATE
+            ) old
+            WHERE s.id = old.id
+            RETURNING s.id, s.first_name, s.last_name, s.email,
+                      s.created_at, s.updated_at,
+                      old.first_name AS old_first_name,
+                      old.last_name  AS old_last_name,
+                      old.email      AS old_email,
+                      old.updated_at AS old_updated_at
             """,
             {"id": student_id, "first": first_name, "last": last_name, "email": email},
         )
-        return row
     except UniqueViolation as e:
         raise ValueError(f"Email already exists: {email}") from e
+    if row is None:
+        return None
+    notify_changed(conn, student_id)
 
+    before = {
+        "id": row["id"],
+        "first_name": row.pop("old_first_name"),
+        "last_name": row.pop("old_last_name"),
+        "email": row.pop("old_email"),
+        "created_at": row["created_at"],
+        "updated_at": row.pop("old_updated_at"),
+    }
+    return before, row
 
-def delete_student(conn, student_id: int) -> int:
-    return execute(conn, "DELETE FROM students WHERE id = %(id)s", {"id": student_id})
+
+def delete_student(conn, student_id: int) -> bool:
+    row = fetch_one(
+        conn, "DELETE FROM students WHERE id = %(id)s RETURNING id", {"id": student_id}
+    )
+    if row is None:
+        return False
+    notify_changed(conn, student_id)
+    return True
@@ -1,3 +1,6 @@
+import base64
+import json
+
 from rich.table import Table
 from rich.console import Console
 
@@ -26,3 +29,34 @@ def render_kv(title: str, d: dict | None):
         return
     for k, v in d.items():
         console.print(f"  [cyan]{k}[/cyan]: {v}")
+
+
+# Same opaque token format as the API's ?after=/?before= cursors
+# (app/core/cursor.py). Kept here so the CLI doesn't depend on the app package.
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> dict:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(values, dict):
+        raise ValueError("Malformed cursor")
+    return values
+
+
+def cursor_values(token: str, **types: type) -> tuple:
+    """Decode a cursor into the values of ``types``' keys, in order. Raises
+    ValueError for bad tokens, including missing keys and wrong types."""
+    values = decode_cursor(token)
+    try:
+        out = tuple(values[key] for key in types)
+    except KeyError as e:
+        raise ValueError("Malformed cursor") from e
+    if not all(type(v) is t for v, t in zip(out, types.values())):
+        raise ValueError("Malformed cursor")
+    return out
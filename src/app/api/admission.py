@@ -0,0 +1,167 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core import metrics
+
+# Client buckets kept per route; the least recently seen are dropped first
+MAX_TRACKED_CLIENTS = 10_000
+
+
+@dataclass
+class RouteLimit:
+    """Admission policy for one path.
+
+    ``concurrency`` requests run at once and up to ``queue`` more wait for
+    at most ``queue_timeout`` seconds; anything beyond that is shed with 503.
+    Each client IP also gets a token bucket of ``rate`` requests/second with
+    bursts of ``burst`` (429 when empty). 0 disables either part.
+    """
+
+    concurrency: int = 0
+    queue: int = 0
+    queue_timeout: float = 1.0
+    rate: float = 0.0
+    burst: int = 1
+
+
+class _RouteState:
+    def __init__(self, path: str, limit: RouteLimit):
+        self.limit = limit
+        self.active = 0
+        self.waiters: deque[asyncio.Future] = deque()
+        self.buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+        self.in_flight = metrics.ADMISSION_IN_FLIGHT.labels(route=path)
+        self.waiting = metrics.ADMISSION_WAITING.labels(route=path)
+        self.queued = metrics.ADMISSION_QUEUED.labels(route=path)
+        self.shed = {
+            reason: metrics.ADMISSION_SHED.labels(route=path, reason=reason)
+            for reason in ("rate_limited", "queue_full", "queue_timeout")
+        }
+
+    def take_token(self, client: str) -> float:
+        """Spend one token; returns 0 on success, else seconds until one is
+        available."""
+        limit = self.limit
+        now = time.monotonic()
+        tokens, last = self.buckets.pop(client, (float(limit.burst), now))
+        tokens = min(float(limit.burst), tokens + (now - last) * limit.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / limit.rate
+        self.buckets[client] = (tokens, now)
+        if len(self.buckets) > MAX_TRACKED_CLIENTS:
+            self.buckets.popitem(last=False)
+        return wait
+
+    async def acquire(self) -> str | None:
+        """Take a concurrency slot; returns the shed reason if we can't."""
+        limit = self.limit
+        if self.active < limit.concurrency and not self.waiters:
+            self.active += 1
+            return None
+        if len(self.waiters) >= limit.queue:
+            return "queue_full"
+
+        fut = asyncio.get_running_loop().create_future()
+        self.waiters.append(fut)
+        self.queued.inc()
+        self.waiting.inc()
+        try:
+            # release() hands its slot straight to us (active stays counted)
+            await asyncio.wait_for(fut, limit.queue_timeout)
+            return None
+        except TimeoutError:
+            # release() handed us the slot in the same tick the wait timed
+            # out: it is ours now, so take it rather than leak it
+            if fut.done() and not fut.cancelled():
+                return None
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            # Client went away just as a slot was handed to us: pass it on
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+        finally:
+            self.waiting.dec()
+            if fut in self.waiters:
+                self.waiters.remove(fut)
+
+    def release(self) -> None:
+        while self.waiters:
+            fut = self.waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionControl:
+    """ASGI middleware that sheds load early instead of letting requests pile
+    up on the DB pool: per-IP token buckets (429) and per-route concurrency
+    limits with a bounded wait queue (503), both with Retry-After.
+
+    State is in-process, so limits apply per worker.
+    """
+
+    def __init__(self, app: ASGIApp, limits: dict[str, RouteLimit]):
+        self.app = app
+        self.routes = {path: _RouteState(path, lim) for path, lim in limits.items()}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        state = self.routes.get(scope["path"]) if scope["type"] == "http" else None
+        if state is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = state.limit
+        if limit.rate > 0:
+            client = scope["client"][0] if scope.get("client") else "unknown"
+            wait = state.take_token(client)
+            if wait:
+                state.shed["rate_limited"].inc()
+                await _reject(429, "Too many requests", wait, scope, receive, send)
+                return
+
+        if limit.concurrency <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await state.acquire()
+        if reason is not None:
+            state.shed[reason].inc()
+            await _reject(
+                503,
+                "Server busy, retry later",
+                limit.queue_timeout,
+                scope,
+                receive,
+                send,
+            )
+            return
+
+        state.in_flight.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            state.in_flight.dec()
+            state.release()
+
+
+async def _reject(
+    status: int, detail: str, retry_after: float, scope, receive, send
+) -> None:
+    response = JSONResponse(
+        {"detail": detail},
+        status_code=status,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+    await response(scope, receive, send)
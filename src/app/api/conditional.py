@@ -0,0 +1,70 @@
+import hashlib
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, Request, Response
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _version(updated_at: datetime) -> int:
+    # Exact integer microseconds, so it round-trips into a WHERE clause
+    return (updated_at - EPOCH) // MICROSECOND
+
+
+def student_etag(row) -> str:
+    """Strong ETag: the row's id plus its trigger-maintained updated_at."""
+    return f'"{row.id}-{_version(row.updated_at)}"'
+
+
+def page_etag(rows: Iterable) -> str:
+    """Weak ETag for a list page, derived from the ids and versions on it."""
+    h = hashlib.sha1()
+    for row in rows:
+        h.update(f"{row.id}-{_version(row.updated_at)},".encode())
+    return f'W/"{h.hexdigest()[:20]}"'
+
+
+def _etags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """A bodiless 304 if If-None-Match matches ``etag`` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return None
+    current = etag.removeprefix("W/")
+    for tag in _etags(header):
+        if tag == "*" or tag.removeprefix("W/") == current:
+            return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def if_match_versions(request: Request, student_id: int) -> list[datetime] | None:
+    """The ``updated_at`` values If-Match allows for this student.
+
+    ``None`` means no precondition (header absent or ``*``). An empty list
+    can never match; the caller's conditional write then finds no row and
+    answers 412.
+    """
+    header = request.headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return None
+
+    versions = []
+    for tag in _etags(header):
+        # Weak tags never satisfy If-Match (strong comparison)
+        if tag.startswith("W/"):
+            continue
+        tag_id, _, version = tag.strip('"').partition("-")
+        if tag_id == str(student_id) and version.isdigit():
+            versions.append(EPOCH + int(version) * MICROSECOND)
+    return versions
+
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(
+        status_code=412, detail="Student was modified (If-Match failed)"
+    )
@@ -1,16 +1,78 @@
-from fastapi import Header, HTTPException
+from contextlib import asynccontextmanager
 
+import anyio
+from fastapi import Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+
+from app.api.read_your_writes import pin_primary, reads_pinned
+from app.core import database
 from app.core.config import settings
 
+DbSession = Session | AsyncSession
+
+# Closing returns the connection to the pool; it must never wait behind
+# requests that are themselves blocked waiting for a pooled connection.
+_close_limiter = anyio.CapacityLimiter(8)
+
+
+@asynccontextmanager
+async def db_session(replica: int | None = None):
+    """Session of whichever kind DB_ASYNC selects, closed without blocking
+    the event loop. For work outside a request, e.g. background tasks."""
+    if database.AsyncSessionLocal is not None:
+        kw = {}
+        if replica is not None:
+            kw["bind"] = database.replicas.async_engines[replica]
+        async with database.AsyncSessionLocal(**kw) as db:
+            yield db
+        return
 
-def get_db():
-    db: Session = SessionLocal()
+    kw = {}
+    if replica is not None:
+        kw["bind"] = database.replicas.engines[replica]
+    db: Session = database.SessionLocal(**kw)
     try:
         yield db
     finally:
-        db.close()
+        await anyio.to_thread.run_sync(db.close, limiter=_close_limiter)
+
+
+async def get_db(request: Request):
+    """Primary (read-write) session.
+
+    With replicas configured, the client is also pinned to the primary for
+    READ_YOUR_WRITES_SECONDS (by ReadYourWritesMiddleware) so it reads its
+    own writes despite replica lag.
+    """
+    if database.replicas:
+        pin_primary(request)
+    async with db_session() as db:
+        yield db
+
+
+async def get_read_db(request: Request):
+    """Session for read-only routes: a replica when configured, unless this
+    client wrote recently. The primary also serves reads while every replica
+    is down."""
+    replica = None
+    if database.replicas and not reads_pinned(request):
+        replica = database.replicas.pick()
+    async with db_session(replica) as db:
+        yield db
+
+
+async def run_db(db: DbSession, fn, /, *args, **kwargs):
+    """Call a (sync) student_service function with either kind of session.
+
+    With DB_ASYNC the function runs via ``AsyncSession.run_sync``, i.e. on the
+    event loop with the async driver doing the I/O; otherwise it runs on the
+    threadpool exactly as a sync route would.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
 
 
 def require_admin(x_api_key: str | None = Header(default=None)):
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+from dataclasses import dataclass
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+
+MAX_KEY_LENGTH = 255
+
+# Client errors a retry of the same request would get again. Anything else
+# that isn't 2xx (401, 408, 429, 5xx, ...) may go differently next time and
+# is never stored.
+FINAL_CLIENT_ERRORS = frozenset({400, 409, 422})
+# Per-client headers, not part of the outcome
+UNSTORED_HEADERS = frozenset({b"set-cookie"})
+
+
+@dataclass(frozen=True)
+class _Stored:
+    digest: str
+    status: int
+    headers: tuple[tuple[bytes, bytes], ...]
+    body: bytes
+
+
+class IdempotencyMiddleware:
+    """Replay responses for retried writes carrying an ``Idempotency-Key``.
+
+    The first request with a key runs normally and its response, if final
+    (2xx or a FINAL_CLIENT_ERRORS status), is kept in ``store`` with a hash of
+    the request body. Retries
+    with the same key and body get that response back, marked
+    ``Idempotent-Replayed: true``, without reaching the route; the same key
+    with a different body is a 422. Duplicates that arrive while the first is
+    still running wait for it instead of racing it to the database.
+
+    Keys are scoped to method + path + X-API-Key, and live in this process
+    only.
+    """
+
+    def __init__(self, app: ASGIApp, routes: set[tuple[str, str]], store: TTLCache):
+        self.app = app
+        self.routes = routes
+        self.store = store
+        self._inflight: dict[tuple, tuple[str, asyncio.Future]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.store.enabled
+            or (scope["method"], scope["path"]) not in self.routes
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        idem_key = headers.get("idempotency-key")
+        if idem_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idem_key or len(idem_key) > MAX_KEY_LENGTH:
+            await _error(400, "Invalid Idempotency-Key", scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        digest = hashlib.sha256(body).hexdigest()
+        # Scoped by credential too: this runs before the route's auth check,
+        # so a caller must never get a response stored for someone else
+        caller = hashlib.sha256(headers.get("x-api-key", "").encode()).digest()
+        key = (scope["method"], scope["path"], caller, idem_key)
+
+        while True:
+            stored = self.store.get(key)
+            if stored is None and key in self._inflight:
+                inflight_digest, fut = self._inflight[key]
+                if inflight_digest != digest:
+                    await _key_reused(scope, receive, send)
+                    return
+                stored = await asyncio.shield(fut)
+                if stored is None:
+                    continue  # no final response to share: run this one
+
+            if stored is None:
+                break
+            if stored.digest != digest:
+                await _key_reused(scope, receive, send)
+            else:
+                await _replay(stored, send)
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (digest, fut)
+        stored = None
+        try:
+            response = await self._call_and_capture(scope, body, receive, send, digest)
+            if _is_final(response.status):
+                stored = response
+                self.store.set(key, stored)
+        finally:
+            del self._inflight[key]
+            fut.set_result(stored)
+
+    async def _call_and_capture(
+        self, scope: Scope, body: bytes, receive: Receive, send: Send, digest: str
+    ) -> _Stored:
+        sent_body = False
+        start: Message = {}
+        chunks: list[bytes] = []
+
+        async def replay_receive() -> Message:
+            nonlocal sent_body
+            if not sent_body:
+                sent_body = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture_send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, replay_receive, capture_send)
+        return _Stored(
+            digest,
+            start.get("status", 500),
+            tuple(
+                (name, value)
+                for name, value in start.get("headers", ())
+                if name.lower() not in UNSTORED_HEADERS
+            ),
+            b"".join(chunks),
+        )
+
+
+def _is_final(status: int) -> bool:
+    return 200 <= status < 300 or status in FINAL_CLIENT_ERRORS
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _replay(stored: _Stored, send: Send) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": [*stored.headers, (b"idempotent-replayed", b"true")],
+        }
+    )
+    await send({"type": "http.response.body", "body": stored.body})
+
+
+async def _error(status: int, detail: str, scope, receive, send) -> None:
+    await JSONResponse({"detail": detail}, status_code=status)(scope, receive, send)
+
+
+async def _key_reused(scope, receive, send) -> None:
+    await _error(
+        422,
+        "Idempotency-Key reused with a different request body",
+        scope,
+        receive,
+        send,
+    )
@@ -0,0 +1,38 @@
+from fastapi import HTTPException, Request, Response
+
+from app.core import cursor
+from app.core.cursor import decode_cursor, encode_cursor  # noqa: F401
+
+
+def cursor_values(token: str | None, **types: type) -> tuple | None:
+    """Decode a cursor into the values of ``types``' keys, in order, turning
+    bad tokens (missing keys, wrong types) into a 400."""
+    if token is None:
+        return None
+    try:
+        return cursor.cursor_values(token, **types)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def cursor_id(token: str | None) -> int | None:
+    """Decode an id-keyed cursor, turning bad tokens into a 400."""
+    values = cursor_values(token, id=int)
+    return values[0] if values else None
+
+
+def set_link_header(
+    request: Request,
+    response: Response,
+    next_cursor: str | None,
+    prev_cursor: str | None,
+) -> None:
+    links = []
+    base = request.url.remove_query_params(["after", "before", "offset"])
+    if next_cursor:
+        links.append(f'<{base.include_query_params(after=next_cursor)}>; rel="next"')
+        response.headers["X-Next-Cursor"] = next_cursor
+    if prev_cursor:
+        links.append(f'<{base.include_query_params(before=prev_cursor)}>; rel="prev"')
+    if links:
+        response.headers["Link"] = ", ".join(links)
@@ -0,0 +1,85 @@
+import asyncio
+from typing import Literal
+
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.profiler import Profile, Sampler
+
+ProfileFormat = Literal["collapsed", "speedscope"]
+
+# X-Profile header values
+PROFILE_FORMATS: dict[str, ProfileFormat] = {
+    "1": "collapsed",
+    "collapsed": "collapsed",
+    "speedscope": "speedscope",
+}
+
+
+def render_profile(profile: Profile, fmt: ProfileFormat, name: str) -> Response:
+    if fmt == "speedscope":
+        return JSONResponse(
+            profile.speedscope(name),
+            headers={
+                "Content-Disposition": f'attachment; filename="{name}.speedscope.json"'
+            },
+        )
+    return PlainTextResponse(profile.collapsed())
+
+
+class ProfileRequestMiddleware:
+    """Profile a single request sent with ``X-Profile: 1`` (or ``collapsed``
+    / ``speedscope``) and a valid admin ``X-API-Key``.
+
+    The profile is the response: the route's body is discarded and its status
+    reported in ``X-Profile-Status``. Nothing is kept in the worker, so this
+    works whichever worker served the request. Only installed when
+    PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, app: ASGIApp, interval: float):
+        self.app = app
+        self.interval = interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        fmt = PROFILE_FORMATS.get(headers.get("x-profile", ""))
+        if fmt is None or headers.get("x-api-key") != settings.ADMIN_API_KEY:
+            await self.app(scope, receive, send)
+            return
+
+        sampler = Sampler(self.interval, task=asyncio.current_task())
+        if not sampler.start():
+            await self.app(scope, receive, _with_headers(send, {"X-Profile": "busy"}))
+            return
+
+        status = None
+
+        async def discard_body(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        try:
+            await self.app(scope, receive, discard_body)
+        finally:
+            profile = sampler.stop()
+        response = render_profile(profile, fmt, "request")
+        response.headers["X-Profile-Status"] = str(status)
+        await response(scope, receive, send)
+
+
+def _with_headers(send: Send, extra: dict[str, str]) -> Send:
+    async def wrapped(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            for name, value in extra.items():
+                headers.append(name, value)
+        await send(message)
+
+    return wrapped
@@ -0,0 +1,43 @@
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core import metrics
+from app.core.query_stats import RequestQueries, current_request
+
+
+class QueryStatsMiddleware:
+    """Count the statements (and DB time) each request causes, by route.
+
+    Sync handlers and run_db() work run in the threadpool with a copy of this
+    context, so their statements land on the same RequestQueries.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueries()
+        token = current_request.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request.reset(token)
+            handler = _route_path(scope)
+            # Unmatched paths (404s, scanners) would only add label noise
+            if handler is not None:
+                labels = {"method": scope["method"], "handler": handler}
+                metrics.DB_QUERIES_PER_REQUEST.labels(**labels).observe(stats.count)
+                metrics.DB_TIME_PER_REQUEST.labels(**labels).observe(stats.seconds)
+
+
+def _route_path(scope: Scope) -> str | None:
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
@@ -0,0 +1,79 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Epoch seconds until which this client's reads must hit the primary. Browsers
+# get it back as a cookie; other clients echo the response header instead.
+READ_PRIMARY_COOKIE = "read_primary_until"
+READ_PRIMARY_HEADER = "X-Read-Primary-Until"
+
+# request.state flag set by get_db() on requests that used the primary
+_STATE_KEY = "pin_primary"
+
+
+def pin_primary(request: Request) -> None:
+    """Have ReadYourWritesMiddleware pin this client to the primary."""
+    setattr(request.state, _STATE_KEY, True)
+
+
+def reads_pinned(request: Request) -> bool:
+    """Whether the client wrote within READ_YOUR_WRITES_SECONDS (cookie or
+    header)."""
+    now = time.time()
+    for value in (
+        request.headers.get(READ_PRIMARY_HEADER),
+        request.cookies.get(READ_PRIMARY_COOKIE),
+    ):
+        try:
+            if value is not None and float(value) > now:
+                return True
+        except ValueError:
+            pass
+    return False
+
+
+class ReadYourWritesMiddleware:
+    """Pin clients that just wrote to the primary for READ_YOUR_WRITES_SECONDS.
+
+    Done on the way out rather than in get_db(), so the cookie and header are
+    also set on Response objects a route returns itself. Only successful
+    (< 400) responses pin.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_pinned(message: Message) -> None:
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] < 400
+                and scope.get("state", {}).get(_STATE_KEY)
+            ):
+                _set_pin(MutableHeaders(scope=message))
+            await send(message)
+
+        await self.app(scope, receive, send_pinned)
+
+
+def _set_pin(headers: MutableHeaders) -> None:
+    until = f"{time.time() + settings.READ_YOUR_WRITES_SECONDS:.3f}"
+    cookie = Response()
+    cookie.set_cookie(
+        READ_PRIMARY_COOKIE,
+        until,
+        max_age=int(settings.READ_YOUR_WRITES_SECONDS) + 1,
+        httponly=True,
+        samesite="lax",
+    )
+    headers.append("set-cookie", cookie.headers["set-cookie"])
+    headers[READ_PRIMARY_HEADER] = until
@@ -0,0 +1,36 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.api.deps import require_admin
+from app.api.profiling import ProfileFormat, render_profile
+from app.core.config import settings
+from app.core.profiler import Sampler
+
+# Only mounted when PROFILING_ENABLED is set (see app.main)
+router = APIRouter(
+    prefix="/debug",
+    tags=["debug"],
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False,
+)
+
+MAX_PROFILE_SECONDS = 300
+
+
+@router.get("/profile")
+async def profile(
+    seconds: float = Query(default=10.0, gt=0, le=MAX_PROFILE_SECONDS),
+    fmt: ProfileFormat = Query(default="collapsed", alias="format"),
+    idle: bool = Query(default=False, description="Keep stacks of parked threads"),
+):
+    """Sample every thread of this process for ``seconds`` and return the
+    stacks, as folded text or a speedscope file."""
+    sampler = Sampler(settings.PROFILE_INTERVAL_MS / 1000, include_idle=idle)
+    if not sampler.start():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        result = sampler.stop()
+    return render_profile(result, fmt, "profile")
@@ -1,11 +1,59 @@
 # app/api/routes_students.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Literal
+
+import orjson
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, require_admin
-from app.schemas.student import StudentCreate, StudentOut, StudentUpdate
+from app.api.conditional import (
+    if_match_versions,
+    not_modified,
+    page_etag,
+    precondition_failed,
+    student_etag,
+)
+from app.api.deps import (
+    DbSession,
+    db_session,
+    get_db,
+    get_read_db,
+    require_admin,
+    run_db,
+)
+from app.api.pagination import (
+    cursor_id,
+    cursor_values,
+    encode_cursor,
+    set_link_header,
+)
+from app.core.config import settings
+from app.core.database import read_session
+from app.schemas.student import (
+    BulkResult,
+    BulkRowResult,
+    StudentCreate,
+    StudentLookup,
+    StudentLookupResult,
+    StudentOut,
+    StudentUpdate,
+)
 from app.services import student_service
+from app.services.change_feed import change_feed, resync_event, row_event
 
 router = APIRouter(prefix="/students", tags=["students"])
 
@@ -14,76 +62,495 @@ def _norm_email(email: str) -> str:
     return email.strip().lower()
 
 
+class RowsResponse(JSONResponse):
+    """orjson-encoded body for rows read straight from the database.
+
+    Read routes return this instead of letting FastAPI validate the rows
+    against ``response_model`` and dump them again: the columns already have
+    the StudentOut shape and our own constraints. OPT_UTC_Z keeps timestamps
+    byte-identical to pydantic's encoding.
+    """
+
+    def render(self, content) -> bytes:
+        return dump_json(content)
+
+
+def dump_json(content) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def _rows_response(content, response: Response) -> RowsResponse:
+    # Returning a Response bypasses the injected one, so carry its headers
+    return RowsResponse(content, headers=response.headers)
+
+
 @router.post("", response_model=StudentOut, dependencies=[Depends(require_admin)])
-def create(payload: StudentCreate, db: Session = Depends(get_db)):
+async def create(payload: StudentCreate, db: DbSession = Depends(get_db)):
     payload.email = _norm_email(payload.email)
 
-    # Friendly pre-check (DB constraint is still source of truth)
-    existing = student_service.get_student_by_email(db, payload.email)
-    if existing:
+    # ON CONFLICT DO NOTHING: no row back means the email is taken
+    student = await run_db(db, student_service.create_student, payload)
+    if student is None:
         raise HTTPException(status_code=409, detail="Email already exists")
+    return student
+
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
 
+async def _bulk_items(request: Request):
+    """Yield decoded rows from a JSON array body or an NDJSON stream."""
+    limit = settings.BULK_MAX_JSON_BYTES
+    too_large = HTTPException(status_code=413, detail=f"Over {limit} bytes")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        # Only each new chunk is split; the unfinished line is carried over
+        tail: list[bytes] = []
+        tail_size = 0
+        async for chunk in request.stream():
+            *lines, rest = chunk.split(b"\n")
+            if lines:
+                lines[0] = b"".join([*tail, lines[0]])
+                tail, tail_size = [], 0
+            for line in lines:
+                if len(line) > limit:
+                    raise too_large
+                if line.strip():
+                    yield line
+            if rest:
+                tail.append(rest)
+                tail_size += len(rest)
+                if tail_size > limit:
+                    raise too_large
+        line = b"".join(tail)
+        if line.strip():
+            yield line
+        return
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
     try:
-        return student_service.create_student(db, payload)
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=409, detail="Email already exists")
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array")
+    for item in items:
+        yield item
+
+
+@router.post("/bulk", response_model=BulkResult, dependencies=[Depends(require_admin)])
+async def bulk_create(request: Request, db: DbSession = Depends(get_db)):
+    """Register many students at once (JSON array or NDJSON).
+
+    Valid rows are written in multi-row INSERT batches; every row gets its own
+    created/duplicate/invalid result and one bad row never fails the batch.
+    """
+    result = BulkResult()
+    batch: list[tuple[int, StudentCreate]] = []
+
+    async def flush():
+        rows = await run_db(
+            db, student_service.bulk_create_students, [p for _, p in batch]
+        )
+        for (index, payload), row in zip(batch, rows):
+            new_id = row.id if row is not None else None
+            status = "created" if new_id is not None else "duplicate"
+            setattr(result, status, getattr(result, status) + 1)
+            result.results.append(
+                BulkRowResult(
+                    index=index, status=status, id=new_id, email=payload.email
+                )
+            )
+        batch.clear()
+
+    index = 0
+    async for item in _bulk_items(request):
+        try:
+            if isinstance(item, bytes):
+                item = json.loads(item)
+            payload = StudentCreate.model_validate(item)
+        except ValidationError as e:
+            errors = json.loads(e.json(include_url=False))
+            result.invalid += 1
+            result.results.append(
+                BulkRowResult(index=index, status="invalid", errors=errors)
+            )
+        except ValueError as e:
+            result.invalid += 1
+            result.results.append(
+                BulkRowResult(index=index, status="invalid", errors=[{"msg": str(e)}])
+            )
+        else:
+            payload.email = _norm_email(payload.email)
+            batch.append((index, payload))
+            if len(batch) >= settings.BULK_BATCH_SIZE:
+                await flush()
+        index += 1
+
+    if batch:
+        await flush()
+
+    result.results.sort(key=lambda r: r.index)
+    return result
 
 
 @router.get("", response_model=list[StudentOut])
-def list_(
-    db: Session = Depends(get_db),
+async def list_(
+    request: Request,
+    response: Response,
+    db: DbSession = Depends(get_read_db),
     limit: int = Query(default=50, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
+    after: str | None = Query(default=None, description="Cursor for the next page"),
+    before: str | None = Query(
+        default=None, description="Cursor for the previous page"
+    ),
     q: str | None = Query(
-        default=None, description="Search query (name/email/phone/address)"
+        default=None,
+        description="Ranked search (name/email/phone/address, prefix matches)",
     ),
 ):
+    if after is not None and before is not None:
+        raise HTTPException(status_code=400, detail="Use either after or before")
+    if (after is not None or before is not None) and (offset or q):
+        raise HTTPException(
+            status_code=400, detail="Cursors cannot be combined with offset or q"
+        )
+
     if q:
-        return student_service.search_students(db, q=q, limit=limit, offset=offset)
-    return student_service.list_students(db, limit=limit, offset=offset)
+        rows = await run_db(
+            db, student_service.search_students, q=q, limit=limit, offset=offset
+        )
+        etag = page_etag(rows)
+        response.headers["ETag"] = etag
+        return not_modified(request, etag) or _rows_response(
+            [row._asdict() for row in rows], response
+        )
+
+    after_id, before_id = cursor_id(after), cursor_id(before)
+    rows = await run_db(
+        db,
+        student_service.list_students,
+        limit=limit,
+        offset=offset,
+        after=after_id,
+        before=before_id,
+    )
+
+    # A full page means there may be more in that direction; coming from the
+    # other direction guarantees there is.
+    if rows:
+        has_next = before_id is not None or len(rows) == limit
+        has_prev = (
+            len(rows) == limit if before_id is not None else after_id is not None
+        ) or offset > 0
+        set_link_header(
+            request,
+            response,
+            next_cursor=encode_cursor({"id": rows[-1].id}) if has_next else None,
+            prev_cursor=encode_cursor({"id": rows[0].id}) if has_prev else None,
+        )
+
+    # Weak: equal pages are equivalent, not byte-identical (Link may differ)
+    etag = page_etag(rows)
+    response.headers["ETag"] = etag
+    return not_modified(request, etag) or _rows_response(
+        [row._asdict() for row in rows], response
+    )
+
+
+@router.post("/lookup", response_model=StudentLookupResult)
+async def lookup(payload: StudentLookup, db: DbSession = Depends(get_read_db)):
+    """Fetch many students by id or by email in one round trip.
+
+    ``students`` follows the order of the request (duplicates collapsed);
+    keys that matched nothing are listed in ``missing``.
+    """
+    if payload.ids is not None:
+        keys = list(dict.fromkeys(payload.ids))
+        found = await run_db(db, student_service.get_students, keys)
+    else:
+        keys = list(dict.fromkeys(_norm_email(e) for e in payload.emails))
+        found = await run_db(db, student_service.get_students_by_email, keys)
+
+    return RowsResponse(
+        {
+            "students": [found[k]._asdict() for k in keys if k in found],
+            "missing": [k for k in keys if k not in found],
+        }
+    )
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_CHUNK_ROWS = 1000
+
+
+def _export_chunks(fmt: str, updated_since: datetime | None):
+    # Owns its (replica) session: the body is produced after the route returns
+    db = read_session()
+    try:
+        rows = student_service.stream_students(
+            db, updated_since=updated_since, batch_size=EXPORT_CHUNK_ROWS
+        )
+        buf = io.StringIO()
+        writer = csv.writer(buf) if fmt == "csv" else None
+        if writer:
+            writer.writerow([c.key for c in student_service.EXPORT_COLUMNS])
+
+        for n, row in enumerate(rows, start=1):
+            if writer:
+                writer.writerow(row)
+            else:
+                # Same encoding as the JSON read routes
+                buf.write(dump_json(row._asdict()).decode())
+                buf.write("\n")
+            if n % EXPORT_CHUNK_ROWS == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+    finally:
+        db.close()
+
+
+@router.get("/export", dependencies=[Depends(require_admin)])
+def export(
+    fmt: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+    updated_since: datetime | None = Query(
+        default=None, description="Only rows with updated_at >= this (incremental)"
+    ),
+):
+    """Stream every student (or those changed since ``updated_since``) in one
+    response, straight off a server-side cursor in constant memory."""
+    return StreamingResponse(
+        _export_chunks(fmt, updated_since),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="students.{fmt}"'},
+    )
+
+
+# Directory rows carry their sort key after these; zip() drops it
+_OUT_KEYS = [c.key for c in student_service.OUT_COLUMNS]
+
+
+def _directory_cursor(row) -> str:
+    return encode_cursor({"last": row.last_key, "first": row.first_key, "id": row.id})
+
+
+@router.get("/directory", response_model=list[StudentOut])
+async def directory(
+    request: Request,
+    response: Response,
+    db: DbSession = Depends(get_read_db),
+    limit: int = Query(default=50, ge=1, le=200),
+    last_name_prefix: str | None = Query(
+        default=None, min_length=1, max_length=80, description="e.g. Sm"
+    ),
+    after: str | None = Query(default=None, description="Cursor for the next page"),
+    before: str | None = Query(
+        default=None, description="Cursor for the previous page"
+    ),
+):
+    """Students in alphabetical order (last name, first name), case-insensitive.
+
+    Jump to a letter with ``last_name_prefix``; /students/directory/letters
+    has the counts per letter.
+    """
+    if after is not None and before is not None:
+        raise HTTPException(status_code=400, detail="Use either after or before")
+    after_key = cursor_values(after, last=str, first=str, id=int)
+    before_key = cursor_values(before, last=str, first=str, id=int)
+
+    rows = await run_db(
+        db,
+        student_service.directory_page,
+        limit=limit,
+        last_name_prefix=last_name_prefix,
+        after=after_key,
+        before=before_key,
+    )
+    if rows:
+        has_next = before_key is not None or len(rows) == limit
+        has_prev = (
+            len(rows) == limit if before_key is not None else after_key is not None
+        )
+        set_link_header(
+            request,
+            response,
+            next_cursor=_directory_cursor(rows[-1]) if has_next else None,
+            prev_cursor=_directory_cursor(rows[0]) if has_prev else None,
+        )
+
+    etag = page_etag(rows)
+    response.headers["ETag"] = etag
+    return not_modified(request, etag) or _rows_response(
+        [dict(zip(_OUT_KEYS, row)) for row in rows], response
+    )
+
+
+@router.get("/directory/letters", response_model=dict[str, int])
+async def directory_letters(db: DbSession = Depends(get_read_db)):
+    """Number of students per initial of the last name, A-Z."""
+    return await run_db(db, student_service.directory_letters)
+
+
+REPLAY_BATCH = 500
+
+
+def _xid_key(row) -> tuple[int, int]:
+    return (row.change_xid, row.id)
+
+
+def _time_key(row) -> tuple[datetime, int]:
+    return (row.updated_at, row.id)
+
+
+async def _replay(fetch, key, after: tuple, floor: int):
+    """Catch-up events from ``fetch``, in keyset batches on the primary. A
+    short session per batch: no connection is held for the life of the
+    stream."""
+    while True:
+        async with db_session() as db:
+            rows = await run_db(db, fetch, after, REPLAY_BATCH)
+        for row in rows:
+            yield row_event(row, floor)
+        if len(rows) < REPLAY_BATCH:
+            return
+        after = key(rows[-1])
+
+
+async def _change_stream(since: datetime | None, resume: int | None):
+    queue = change_feed.subscribe()
+    try:
+        # Subscribed first, so nothing committed during the catch-up is
+        # missed. Whatever commits from here on is at or above floor.
+        if since is not None or resume is not None:
+            async with db_session() as db:
+                floor = await run_db(db, student_service.resume_floor)
+            # Deletes since then are gone from the table, so not replayed
+            yield resync_event("resume")
+            if resume is not None:
+                replay = _replay(
+                    student_service.changed_after, _xid_key, (resume, 0), floor
+                )
+            else:
+                replay = _replay(
+                    student_service.changed_since, _time_key, (since, 0), floor
+                )
+            async for event in replay:
+                yield event
+
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), settings.CHANGES_HEARTBEAT_SECONDS
+                )
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if isinstance(event, str):  # lagging, LISTEN reconnected, shutdown
+                yield resync_event(event)
+                return
+            yield event
+    finally:
+        change_feed.unsubscribe(queue)
+
+
+@router.get("/changes")
+async def changes(
+    since: datetime | None = Query(
+        default=None, description="Replay changes from this time first"
+    ),
+    last_event_id: str | None = Header(default=None),
+):
+    """Server-Sent Events for every insert/update/delete of a student.
+
+    Each event's id is an opaque resume token (see V6): a client
+    reconnecting with Last-Event-ID first gets every row written since that
+    event, read back from the table, however long the writing transactions
+    ran. Some may arrive twice; apply a row only if its updated_at is not
+    older than what you have. ``since`` starts a new stream from rows
+    updated after a point in time.
+
+    Deletes are only delivered live. Whenever some may have been missed the
+    stream sends a ``resync`` event: before a replay, and before closing a
+    stream that fell behind or lost its LISTEN connection. A client that
+    keeps a copy of the students reconciles it then.
+    """
+    if not change_feed.running:
+        raise HTTPException(status_code=503, detail="Change feed is disabled")
+    if change_feed.full:
+        raise HTTPException(status_code=503, detail="Too many change streams")
+    resume = None
+    if last_event_id is not None:
+        if not last_event_id.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+        resume, since = int(last_event_id), None
+    if since is not None and since.tzinfo is None:
+        raise HTTPException(status_code=400, detail="since needs a timezone")
+
+    return StreamingResponse(
+        _change_stream(since, resume),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/{student_id}", response_model=StudentOut)
-def get_one(student_id: int, db: Session = Depends(get_db)):
-    student = student_service.get_student(db, student_id)
+async def get_one(
+    student_id: int,
+    request: Request,
+    response: Response,
+    db: DbSession = Depends(get_read_db),
+):
+    student = await run_db(db, student_service.get_student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
-    return student
+
+    etag = student_etag(student)
+    response.headers["ETag"] = etag
+    return not_modified(request, etag) or student
 
 
 @router.patch(
     "/{student_id}", response_model=StudentOut, dependencies=[Depends(require_admin)]
 )
-def update(student_id: int, payload: StudentUpdate, db: Session = Depends(get_db)):
-    student = student_service.get_student(db, student_id)
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
-
-    # If email provided, normalize + check uniqueness up-front
+async def update(
+    student_id: int,
+    payload: StudentUpdate,
+    request: Request,
+    response: Response,
+    db: DbSession = Depends(get_db),
+):
     if payload.email is not None:
         payload.email = _norm_email(payload.email)
 
-        # If same as current, no-op is fine (return current resource)
-        if payload.email == student.email:
-            return student
-
-        other = student_service.get_student_by_email(db, payload.email)
-        if other and other.id != student.id:
-            raise HTTPException(status_code=409, detail="Email already exists")
-
+    versions = if_match_versions(request, student_id)
     try:
-        return student_service.update_student(db, student, payload)
+        student = await run_db(
+            db, student_service.update_student, student_id, payload, versions
+        )
     except IntegrityError:
-        db.rollback()
+        # get_db closes the session, which rolls the failed transaction back
         raise HTTPException(status_code=409, detail="Email already exists")
+    if student is None:
+        if versions is not None:
+            raise precondition_failed()
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    response.headers["ETag"] = student_etag(student)
+    return student
 
 
 @router.delete("/{student_id}", dependencies=[Depends(require_admin)])
-def delete(student_id: int, db: Session = Depends(get_db)):
-    student = student_service.get_student(db, student_id)
-    if not student:
+async def delete(student_id: int, request: Request, db: DbSession = Depends(get_db)):
+    versions = if_match_versions(request, student_id)
+    if not await run_db(db, student_service.delete_student, student_id, versions):
+        if versions is not None:
+            raise precondition_failed()
         raise HTTPException(status_code=404, detail="Student not found")
-
-    student_service.delete_student(db, student)
     return {"status": "deleted"}
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from functools import cached_property
+from typing import Any
+
+from app.core import metrics
+from app.core.config import settings
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds.
+
+    ``maxsize <= 0`` disables it: every get misses and set is a no-op. Values
+    must be immutable (rows, not ORM objects) since they are shared across
+    requests and threads. ``maxsize`` and ``ttl`` may be callables, read on
+    first use, so module-level caches can be sized from settings without
+    loading them at import.
+
+    ``generation`` counts invalidations. A reader that loads a value from the
+    database takes it first and passes it to ``set``, which then drops the
+    value if anything was invalidated in between: the load may predate the
+    write that invalidation was for.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int | Callable[[], int],
+        ttl: float | Callable[[], float],
+    ):
+        self.name = name
+        self._limits = (maxsize, ttl)
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+        self._hits = metrics.CACHE_HITS.labels(cache=name)
+        self._misses = metrics.CACHE_MISSES.labels(cache=name)
+        self._evicted = {
+            reason: metrics.CACHE_EVICTIONS.labels(cache=name, reason=reason)
+            for reason in ("size", "expired", "invalidated")
+        }
+        # Set on every change rather than via set_function(), which
+        # multiprocess metrics can't see
+        self._entries = metrics.CACHE_ENTRIES.labels(cache=name)
+
+    @cached_property
+    def maxsize(self) -> int:
+        value = self._limits[0]
+        return value() if callable(value) else value
+
+    @cached_property
+    def ttl(self) -> float:
+        value = self._limits[1]
+        return value() if callable(value) else value
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires, value = item
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self._hits.inc()
+                    return value
+                del self._data[key]
+                self._evicted["expired"].inc()
+                self._entries.set(len(self._data))
+        self._misses.inc()
+        return default
+
+    def set(self, key: Hashable, value: Any, generation: int | None = None) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evicted["size"].inc()
+            self._entries.set(len(self._data))
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self.generation += 1
+            if self._data.pop(key, None) is not None:
+                self._evicted["invalidated"].inc()
+                self._entries.set(len(self._data))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            n = len(self._data)
+            self._data.clear()
+            self._entries.set(0)
+        self._evicted["invalidated"].inc(n)
+
+
+# id -> students row, and email -> id for lookups by email
+student_cache = TTLCache(
+    "student", lambda: settings.STUDENT_CACHE_SIZE, lambda: settings.STUDENT_CACHE_TTL
+)
+student_email_cache = TTLCache(
+    "student_email",
+    lambda: settings.STUDENT_CACHE_SIZE,
+    lambda: settings.STUDENT_CACHE_TTL,
+)
+
+# Per-letter counts of the directory (a single entry)
+directory_letters_cache = TTLCache(
+    "directory_letters", 1, lambda: settings.DIRECTORY_LETTERS_TTL
+)
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import cast
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,13 +9,127 @@ class Settings(BaseSettings):
     ENV: str = "dev"
 
     DATABASE_URL: str
+    # Serve requests on an AsyncEngine (psycopg async) instead of the threadpool
+    DB_ASYNC: bool = False
+    # Connection pool (applies to the primary and to each replica)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # Seconds before a connection is replaced; -1 disables
+    DB_POOL_RECYCLE: int = -1
+    # always | never | idle (ping only connections that sat unused in the pool
+    # for more than DB_POOL_PING_IDLE_SECONDS)
+    DB_POOL_PRE_PING: str = "always"
+    DB_POOL_PING_IDLE_SECONDS: float = 30.0
+    # Connections opened per engine before the app reports ready (default
+    # DB_POOL_SIZE; 0 leaves the pool to fill on demand)
+    DB_POOL_WARM: int | None = None
+    # /debug/profile and the X-Profile request header (admin only); nothing is
+    # mounted or sampled when off
+    PROFILING_ENABLED: bool = False
+    PROFILE_INTERVAL_MS: float = 10.0
+
+    # Statements slower than this are logged by app.sql (0 disables)
+    DB_SLOW_QUERY_MS: float = 250.0
+
+    # In-process student cache (entries per pod; 0 disables). Writes from any
+    # pod are propagated over LISTEN/NOTIFY; the TTL bounds anything missed.
+    STUDENT_CACHE_SIZE: int = 10_000
+    STUDENT_CACHE_TTL: float = 60.0
+
+    # Seconds the directory's A-Z counts are reused (0 recounts every time)
+    DIRECTORY_LETTERS_TTL: float = 60.0
+
+    # GET /students/changes (SSE): a stream more than CHANGES_QUEUE_SIZE events
+    # behind is closed so the client resumes from the table; at most
+    # CHANGES_MAX_SUBSCRIBERS streams per process; a keep-alive comment every
+    # CHANGES_HEARTBEAT_SECONDS keeps idle streams open through proxies
+    CHANGES_ENABLED: bool = True
+    CHANGES_QUEUE_SIZE: int = 1000
+    CHANGES_MAX_SUBSCRIBERS: int = 1000
+    CHANGES_HEARTBEAT_SECONDS: float = 15.0
+
+    # Group commit for /public/register: queue registrations and write them
+    # in batches of up to REGISTER_BATCH_SIZE, lingering REGISTER_LINGER_MS for
+    # more rows after the first. On shutdown queued rows get
+    # REGISTER_DRAIN_SECONDS to be written before their requests fail.
+    REGISTER_GROUP_COMMIT: bool = False
+    REGISTER_BATCH_SIZE: int = 100
+    REGISTER_LINGER_MS: float = 5.0
+    REGISTER_DRAIN_SECONDS: float = 10.0
+
+    # Admission control for /public/register (per worker; 0 disables):
+    # concurrent requests, how many may wait and for how long, and a per-IP
+    # token bucket. Client IPs come from uvicorn's proxy headers handling
+    # (FORWARDED_ALLOW_IPS) when behind the ingress.
+    PUBLIC_MAX_CONCURRENCY: int = 8
+    PUBLIC_MAX_QUEUE: int = 32
+    PUBLIC_QUEUE_TIMEOUT: float = 2.0
+    PUBLIC_RATE_PER_IP: float = 5.0
+    PUBLIC_BURST_PER_IP: int = 10
+
+    # Idempotency-Key replay store for POST /students and /public/register
+    # (responses kept per pod; 0 disables)
+    IDEMPOTENCY_MAX_KEYS: int = 10_000
+    IDEMPOTENCY_TTL: float = 24 * 3600
+
+    # Optional read replicas for GET traffic, comma separated
+    DATABASE_READ_URLS: str = ""
+    # round_robin | least_latency
+    DATABASE_READ_STRATEGY: str = "round_robin"
+    # A replica that fails to connect is skipped this long (all down: primary)
+    DATABASE_READ_RETRY_SECONDS: float = 10.0
+    # After a write, that client's reads stay on the primary this long
+    READ_YOUR_WRITES_SECONDS: float = 5.0
     ADMIN_API_KEY: str = "change-me"
 
+    # Rows per multi-row INSERT for POST /students/bulk (6 bind params per row)
+    BULK_BATCH_SIZE: int = 1000
+    # JSON-array bodies are parsed whole, so they are capped (413 beyond);
+    # NDJSON streams are not, but any one line is held to the same cap
+    BULK_MAX_JSON_BYTES: int = 10 * 1024 * 1024
+
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # Restart on code changes (python -m app.main); development only
+    RELOAD: bool = False
+
+    # Production server (python -m app.server): worker processes (0 = one per
+    # CPU of the container's CPU limit), recycled after WORKER_MAX_REQUESTS
+    # (+ random jitter, 0 disables) with WORKER_GRACEFUL_TIMEOUT to finish
+    # in-flight requests. KEEPALIVE outlives the ingress' upstream idle timeout
+    # so nginx never reuses a connection we are closing.
+    WORKERS: int = 0
+    WORKER_MAX_REQUESTS: int = 10_000
+    WORKER_MAX_REQUESTS_JITTER: int = 1_000
+    WORKER_TIMEOUT: int = 60
+    WORKER_GRACEFUL_TIMEOUT: int = 25
+    KEEPALIVE: int = 75
+    # Import the app once in the master and fork workers from it (faster
+    # restarts, shared memory pages); SO_REUSEPORT on the listening socket
+    PRELOAD_APP: bool = True
+    REUSE_PORT: bool = False
+
+    @property
+    def read_urls(self) -> list[str]:
+        return [u.strip() for u in self.DATABASE_READ_URLS.split(",") if u.strip()]
 
     # ✅ Ignore env vars that aren't defined in this Settings model
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+class _LazySettings:
+    """Reads the environment on first attribute access, not at import, so
+    importing app modules (tests, tooling, the import-time check) needs no
+    DATABASE_URL and does no work."""
+
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+
+settings = cast(Settings, _LazySettings())
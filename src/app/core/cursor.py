@@ -0,0 +1,34 @@
+import base64
+import json
+
+# Opaque keyset cursors for the API's ?after=/?before=. The admin CLI ships
+# separately and keeps its own copy (admin_cli/util.py); keep the two in step.
+
+
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> dict:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(values, dict):
+        raise ValueError("Malformed cursor")
+    return values
+
+
+def cursor_values(token: str, **types: type) -> tuple:
+    """Decode a cursor into the values of ``types``' keys, in order. Raises
+    ValueError for bad tokens, including missing keys and wrong types."""
+    values = decode_cursor(token)
+    try:
+        out = tuple(values[key] for key in types)
+    except KeyError as e:
+        raise ValueError("Malformed cursor") from e
+    if not all(type(v) is t for v, t in zip(out, types.values())):
+        raise ValueError("Malformed cursor")
+    return out
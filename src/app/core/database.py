@@ -1,12 +1,164 @@
+import threading
+from dataclasses import dataclass
+
+import anyio
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from app.core.config import settings
+from app.core.listener import PgListener
+from app.core.pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    instrument_pool,
+    pool_options,
+)
+from app.core.query_stats import instrument_queries
+from app.core.replicas import ReplicaPool
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def async_url(url: str):
+    # psycopg 3 is the only installed driver with an asyncio flavour
+    u = make_url(url)
+    if u.drivername in ("postgresql", "postgresql+psycopg2"):
+        u = u.set(drivername="postgresql+psycopg")
+    return u
+
+
+def psycopg_dsn(url: str) -> str:
+    """libpq URI for direct psycopg connections (no SQLAlchemy driver suffix)."""
+    return (
+        make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+    )
+
+
+def make_engine(url: str, name: str):
+    eng = create_engine(url, poolclass=InstrumentedQueuePool, **pool_options())
+    instrument_pool(eng, name)
+    instrument_queries(eng, name)
+    return eng
+
+
+def make_async_engine(url: str, name: str):
+    eng = create_async_engine(
+        async_url(url), poolclass=InstrumentedAsyncAdaptedQueuePool, **pool_options()
+    )
+    instrument_pool(eng.sync_engine, f"{name}_async")
+    instrument_queries(eng.sync_engine, f"{name}_async")
+    return eng
+
+
+@dataclass
+class Database:
+    engine: Engine
+    SessionLocal: sessionmaker
+    # Only built when DB_ASYNC is on; the sync engine stays available for the
+    # few code paths that stream from a plain generator (e.g. /students/export).
+    async_engine: AsyncEngine | None
+    AsyncSessionLocal: async_sessionmaker | None
+    # Read replicas (DATABASE_READ_URLS); empty when not configured
+    replicas: ReplicaPool
+    # Shared LISTEN connection; handlers are subscribed and it is started by
+    # the app lifespan (see app.main)
+    listener: PgListener
+
+
+_database: Database | None = None
+_database_lock = threading.Lock()
+
+
+def get_database() -> Database:
+    """Engines, session factories and the listener, built on first use.
+
+    Creating engines doesn't connect, but it does read settings; deferring it
+    keeps imports free of side effects. The app lifespan calls this (and
+    warm_pools) before serving; elsewhere the first use builds it.
+    """
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = _build()
+    return _database
+
+
+def _build() -> Database:
+    engine = make_engine(settings.DATABASE_URL, "primary")
+    async_engine = AsyncSessionLocal = None
+    if settings.DB_ASYNC:
+        async_engine = make_async_engine(settings.DATABASE_URL, "primary")
+        # Nothing may lazy-load after commit outside run_sync(), so don't expire
+        AsyncSessionLocal = async_sessionmaker(
+            async_engine, autoflush=False, expire_on_commit=False
+        )
+    replicas = ReplicaPool(
+        [make_engine(url, f"replica{i}") for i, url in enumerate(settings.read_urls)],
+        [
+            make_async_engine(url, f"replica{i}")
+            for i, url in enumerate(settings.read_urls)
+        ]
+        if settings.DB_ASYNC
+        else None,
+        strategy=settings.DATABASE_READ_STRATEGY,
+        retry_after=settings.DATABASE_READ_RETRY_SECONDS,
+    )
+    return Database(
+        engine=engine,
+        SessionLocal=sessionmaker(autocommit=False, autoflush=False, bind=engine),
+        async_engine=async_engine,
+        AsyncSessionLocal=AsyncSessionLocal,
+        replicas=replicas,
+        listener=PgListener(psycopg_dsn(settings.DATABASE_URL)),
+    )
+
+
+def __getattr__(name: str):
+    # database.engine, database.SessionLocal, ... keep working, lazily
+    if name in Database.__dataclass_fields__:
+        return getattr(get_database(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def read_session():
+    """Sync session on a replica when configured, else on the primary."""
+    db = get_database()
+    replica = db.replicas.pick() if db.replicas else None
+    if replica is not None:
+        return db.SessionLocal(bind=db.replicas.engines[replica])
+    return db.SessionLocal()
+
+
+async def warm_pools(connections: int) -> None:
+    """Open ``connections`` connections on every engine that serves requests
+    (the async ones with DB_ASYNC, else the sync ones), so the first requests
+    don't pay for connection setup."""
+    db = get_database()
+    if db.async_engine is not None:
+        for eng in [db.async_engine, *db.replicas.async_engines]:
+            held = []
+            try:
+                for _ in range(connections):
+                    held.append(await eng.connect())
+            finally:
+                for conn in held:
+                    await conn.close()
+        return
+
+    def hold(eng: Engine) -> None:
+        held = []
+        try:
+            for _ in range(connections):
+                held.append(eng.connect())
+        finally:
+            for conn in held:
+                conn.close()
+
+    for eng in [db.engine, *db.replicas.engines]:
+        # Abandoned (not waited for) if the caller times out
+        await anyio.to_thread.run_sync(hold, eng, abandon_on_cancel=True)
@@ -0,0 +1,80 @@
+import logging
+import threading
+from collections import defaultdict
+from collections.abc import Callable
+
+import psycopg
+from psycopg import sql
+
+log = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+
+class PgListener:
+    """One dedicated LISTEN connection per process.
+
+    A daemon thread receives NOTIFYs and calls the handlers subscribed to each
+    channel with the payload. After every (re)connect the ``on_connect``
+    callbacks run, since notifications sent while disconnected are lost.
+    """
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._handlers: dict[str, list[Callable[[str], None]]] = defaultdict(list)
+        self._on_connect: list[Callable[[], None]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, channel: str, handler: Callable[[str], None]) -> None:
+        if handler not in self._handlers[channel]:
+            self._handlers[channel].append(handler)
+
+    def on_connect(self, callback: Callable[[], None]) -> None:
+        if callback not in self._on_connect:
+            self._on_connect.append(callback)
+
+    def start(self) -> None:
+        if self._thread is not None or not self._handlers:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="pg-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self.dsn, autocommit=True) as conn:
+                    for channel in self._handlers:
+                        conn.execute(
+                            sql.SQL("LISTEN {}").format(sql.Identifier(channel))
+                        )
+                    for callback in self._on_connect:
+                        callback()
+                    delay = RECONNECT_DELAY
+
+                    while not self._stop.is_set():
+                        # Wake up every second to notice stop()
+                        for n in conn.notifies(timeout=1.0):
+                            self._dispatch(n.channel, n.payload)
+            except psycopg.Error:
+                log.exception("LISTEN connection lost, reconnecting in %.0fs", delay)
+                self._stop.wait(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    def _dispatch(self, channel: str, payload: str) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(payload)
+            except Exception:
+                log.exception("NOTIFY handler for %s failed", channel)
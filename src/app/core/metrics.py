@@ -0,0 +1,141 @@
+"""Prometheus metrics owned by the app (HTTP metrics come from the Instrumentator).
+
+Everything registers on the default registry, so it shows up on /metrics.
+Under app.server (several worker processes) prometheus_client runs in
+multiprocess mode: gauges say how to combine workers (``livesum``: total over
+live workers) and must be set explicitly, since set_function() callbacks are
+invisible to the worker that answers the scrape.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Configured pool size", ["pool"], multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAITING = Gauge(
+    "db_pool_waiting",
+    "Checkouts currently waiting for a connection",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=(
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+        30,
+    ),
+)
+
+CACHE_HITS = Counter("cache_hits", "In-process cache hits", ["cache"])
+CACHE_MISSES = Counter("cache_misses", "In-process cache misses", ["cache"])
+CACHE_EVICTIONS = Counter(
+    "cache_evictions",
+    "Entries dropped from an in-process cache",
+    ["cache", "reason"],
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries",
+    "Entries in an in-process cache",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+
+GROUP_COMMIT_BATCH_SIZE = Histogram(
+    "group_commit_batch_size",
+    "Rows written per group commit",
+    ["queue"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+GROUP_COMMIT_QUEUE_DEPTH = Histogram(
+    "group_commit_queue_depth",
+    "Queued writes when a batch is started",
+    ["queue"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000),
+)
+GROUP_COMMIT_WAIT = Histogram(
+    "group_commit_wait_seconds",
+    "Time from submit to commit for a queued write",
+    ["queue"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "admission_in_flight",
+    "Requests admitted and running",
+    ["route"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_WAITING = Gauge(
+    "admission_waiting",
+    "Requests waiting in the admission queue",
+    ["route"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUED = Counter(
+    "admission_queued", "Requests that had to wait for a slot", ["route"]
+)
+ADMISSION_SHED = Counter(
+    "admission_shed",
+    "Requests rejected by admission control",
+    ["route", "reason"],
+)
+
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "Statement execution time, by normalized statement",
+    ["pool", "statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Statements executed while serving one request",
+    ["method", "handler"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Total statement time while serving one request",
+    ["method", "handler"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+CHANGE_FEED_SUBSCRIBERS = Gauge(
+    "change_feed_subscribers",
+    "Open GET /students/changes streams",
+    multiprocess_mode="livesum",
+)
+CHANGE_FEED_EVENTS = Counter(
+    "change_feed_events_total", "Change notifications received from Postgres"
+)
+CHANGE_FEED_DISCONNECTS = Counter(
+    "change_feed_disconnects_total",
+    "Streams closed by the server so the client resumes from the table",
+    ["reason"],
+)
@@ -0,0 +1,115 @@
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core import metrics
+from app.core.config import settings
+
+PRE_PING_STRATEGIES = ("always", "idle", "never")
+
+
+class _CheckoutMetrics:
+    """Times every pool checkout, tracks how many wait on an exhausted pool,
+    and keeps the checked-out/overflow gauges current (set here rather than
+    computed at scrape time, so they also work with multiprocess metrics)."""
+
+    metrics_name = "unnamed"
+
+    def _do_get(self):
+        # Only a checkout that finds the pool exhausted actually waits
+        waiting = None
+        if self._exhausted():
+            waiting = metrics.DB_POOL_WAITING.labels(pool=self.metrics_name)
+            waiting.inc()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if waiting is not None:
+                waiting.dec()
+            metrics.DB_POOL_CHECKOUT_WAIT.labels(pool=self.metrics_name).observe(
+                time.perf_counter() - started
+            )
+            self._update_gauges()
+
+    def _do_return_conn(self, record):
+        try:
+            super()._do_return_conn(record)
+        finally:
+            self._update_gauges()
+
+    def _exhausted(self) -> bool:
+        # max_overflow=-1 means unlimited: a new connection is always opened
+        if self._max_overflow < 0:
+            return False
+        return self.checkedout() >= self.size() + self._max_overflow
+
+    def _update_gauges(self):
+        metrics.DB_POOL_CHECKED_OUT.labels(pool=self.metrics_name).set(
+            self.checkedout()
+        )
+        metrics.DB_POOL_OVERFLOW.labels(pool=self.metrics_name).set(
+            max(self.overflow(), 0)
+        )
+
+
+class InstrumentedQueuePool(_CheckoutMetrics, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutMetrics, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options() -> dict:
+    """create_engine() pool kwargs from Settings."""
+    if settings.DB_POOL_PRE_PING not in PRE_PING_STRATEGIES:
+        raise ValueError(
+            f"DB_POOL_PRE_PING must be one of {', '.join(PRE_PING_STRATEGIES)}"
+        )
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "always",
+    }
+
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    """Label the engine's pool for metrics and apply the idle pre-ping policy.
+
+    For an AsyncEngine pass ``async_engine.sync_engine``.
+    """
+    pool = engine.pool
+    pool.metrics_name = name
+
+    metrics.DB_POOL_SIZE.labels(pool=name).set(pool.size())
+    if isinstance(pool, _CheckoutMetrics):
+        pool._update_gauges()
+
+    if settings.DB_POOL_PRE_PING != "idle":
+        return
+
+    # Only ping connections that sat in the pool long enough to have gone
+    # stale; busy connections skip the extra round trip entirely.
+    @event.listens_for(pool, "checkin")
+    def _checked_in(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None:
+            return  # freshly connected
+        if time.monotonic() - checked_in_at < settings.DB_POOL_PING_IDLE_SECONDS:
+            return
+        try:
+            alive = engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            raise exc.DisconnectionError() from e
+        if not alive:
+            # The pool discards this connection and retries with a new one
+            raise exc.DisconnectionError()
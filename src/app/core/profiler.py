@@ -0,0 +1,135 @@
+"""In-process sampling profiler for /debug/profile and ``X-Profile: 1``.
+
+A daemon thread snapshots every other thread's stack with
+``sys._current_frames()`` at a fixed interval and counts identical stacks.
+Nothing runs unless a profile was asked for.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+# Leaf frames that mean "this thread is parked": idle threadpool workers, and
+# the event loop waiting for I/O (in select, or inside uvloop's C code)
+IDLE_FILES = ("selectors.py", "threading.py", "queue.py")
+IDLE_FUNCTIONS = ("asyncio.runners:Runner.run",)
+# Background threads that spend their life blocked
+IDLE_THREADS = ("pg-listener",)
+
+# One sampler at a time: they would skew each other and double the overhead
+_active = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Profile:
+    # (thread, frame, frame, ...) root first -> number of samples
+    stacks: tuple[tuple[tuple[str, ...], int], ...]
+    interval: float
+    duration: float
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format (flamegraph.pl, speedscope, ...)."""
+        lines = [";".join(stack) + f" {n}" for stack, n in self.stacks]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "student-reg") -> dict:
+        """speedscope.app "sampled" file, weighted in seconds."""
+        frames: dict[str, int] = {}
+        samples, weights = [], []
+        for stack, n in self.stacks:
+            samples.append([frames.setdefault(f, len(frames)) for f in stack])
+            weights.append(n * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": f} for f in frames]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.duration,
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+            "exporter": "student-reg",
+        }
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}"
+
+
+class Sampler:
+    """Samples all threads every ``interval`` seconds until stopped.
+
+    With ``task`` set, event-loop samples are only kept while that asyncio
+    task is the one running, so a single request's profile leaves out other
+    requests' coroutines (threadpool samples can't be attributed and are all
+    kept). Idle stacks are dropped unless ``include_idle``.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        task: asyncio.Task | None = None,
+        include_idle: bool = False,
+    ):
+        self.interval = interval
+        self.include_idle = include_idle
+        self._task = task
+        self._loop = task.get_loop() if task is not None else None
+        self._loop_thread = threading.get_ident() if task is not None else None
+        self._counts: Counter[tuple[str, ...]] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = 0.0
+        self._elapsed = 0.0
+
+    def start(self) -> bool:
+        """Start sampling; False if another sampler is already running."""
+        if not _active.acquire(blocking=False):
+            return False
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            _active.release()
+            self._elapsed = time.perf_counter() - self._started
+        stacks = tuple(self._counts.most_common())
+        return Profile(stacks, self.interval, self._elapsed)
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or not self._keep(ident, names.get(ident), frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._counts[tuple(reversed(stack))] += 1
+
+    def _keep(self, ident: int, thread: str | None, frame) -> bool:
+        if not self.include_idle and (
+            thread in IDLE_THREADS
+            or frame.f_code.co_filename.endswith(IDLE_FILES)
+            or _frame_name(frame) in IDLE_FUNCTIONS
+        ):
+            return False
+        if ident == self._loop_thread:
+            return asyncio.current_task(self._loop) is self._task
+        return True
@@ -0,0 +1,141 @@
+"""Statement timing, per-request query counts and the slow-query log.
+
+``instrument_queries`` hooks an engine's cursor events; every statement is
+timed into db_statement_duration_seconds under a normalized label, added to
+the current request's ``RequestQueries`` (set by QueryStatsMiddleware) and
+logged as JSON on the ``app.sql`` logger when it exceeds DB_SLOW_QUERY_MS.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import metrics
+from app.core.config import settings
+
+log = logging.getLogger("app.sql")
+
+# Distinct statement labels before new ones are folded into "other"
+MAX_STATEMENT_LABELS = 500
+
+
+@dataclass
+class RequestQueries:
+    count: int = 0
+    seconds: float = 0.0
+
+
+current_request: ContextVar[RequestQueries | None] = ContextVar(
+    "current_request_queries", default=None
+)
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"%\(\w+\)s|%s|\$\d+"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\s+"), " "),
+    # IN/VALUES lists of any length, and multi-row VALUES
+    (re.compile(r"\(\?(?:, \?)+\)"), "(?, ...)"),
+    (re.compile(r"\((?:\?|\?, \.\.\.)\)(?:, \((?:\?|\?, \.\.\.)\))+"), "(...), ..."),
+]
+_TARGET = re.compile(
+    r"\b(INSERT INTO|UPDATE|DELETE FROM)\s+\"?(\w+)|\b(SELECT)\b.*?\bFROM\s+\"?(\w+)",
+    re.IGNORECASE,
+)
+_labels: set[str] = set()
+
+
+@lru_cache(maxsize=2048)
+def normalize(statement: str) -> str:
+    """Statement text with literals and parameters replaced by ``?``."""
+    text = statement.strip()
+    for pattern, repl in _LITERALS:
+        text = pattern.sub(repl, text)
+    return text
+
+
+@lru_cache(maxsize=2048)
+def statement_label(statement: str) -> str:
+    """Short, bounded metric label: ``"<verb> <table>:<hash>"``.
+
+    The verb and table come from the first write in the statement (so the
+    CTE-wrapped writes in student_service read as updates, not selects), else
+    the first SELECT ... FROM. The hash tells apart statements on the same
+    table and matches the ``fingerprint`` in slow-query log lines.
+    """
+    text = normalize(statement)
+    digest = fingerprint(text)
+    writes = [m for m in _TARGET.finditer(text) if m.group(1)]
+    m = writes[0] if writes else _TARGET.search(text)
+    if m is None:
+        label = f"{text.split(' ', 1)[0].lower()}:{digest}"
+    elif m.group(1):
+        label = f"{m.group(1).split()[0].lower()} {m.group(2)}:{digest}"
+    else:
+        label = f"select {m.group(4)}:{digest}"
+
+    if label not in _labels:
+        if len(_labels) >= MAX_STATEMENT_LABELS:
+            return "other"
+        _labels.add(label)
+    return label
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:8]
+
+
+def instrument_queries(engine: Engine, name: str) -> None:
+    """Time every statement on ``engine`` (for an AsyncEngine pass
+    ``async_engine.sync_engine``)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        record(name, statement, elapsed, cursor.rowcount)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def record(pool: str, statement: str, elapsed: float, rowcount: int) -> None:
+    label = statement_label(statement)
+    metrics.DB_STATEMENT_DURATION.labels(pool=pool, statement=label).observe(elapsed)
+
+    stats = current_request.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+    if 0 < settings.DB_SLOW_QUERY_MS <= elapsed * 1000:
+        text = normalize(statement)
+        # Parameters are left out on purpose: they carry student PII
+        log.warning(
+            "slow query %s",
+            json.dumps(
+                {
+                    "duration_ms": round(elapsed * 1000, 2),
+                    "pool": pool,
+                    "statement": label,
+                    "fingerprint": fingerprint(text),
+                    "rowcount": rowcount,
+                    "request_queries": stats.count if stats else None,
+                    "sql": text[:2000],
+                }
+            ),
+        )
@@ -0,0 +1,94 @@
+import itertools
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+log = logging.getLogger(__name__)
+
+# Weight of the newest sample in the per-replica latency average
+EWMA_ALPHA = 0.2
+
+
+class ReplicaPool:
+    """Read replicas plus the policy for picking one per request.
+
+    ``round_robin`` cycles through replicas; ``least_latency`` picks the one
+    with the lowest moving average of statement round-trip time, measured
+    from the engines' own cursor events.
+
+    A replica whose connection fails (refused, dropped, timed out) is skipped
+    for ``retry_after`` seconds; ``pick`` returns ``None`` when every replica
+    is down, and callers read from the primary instead.
+    """
+
+    def __init__(
+        self,
+        engines: list[Engine],
+        async_engines: list[AsyncEngine] | None = None,
+        strategy: str = "round_robin",
+        retry_after: float = 10.0,
+    ):
+        if strategy not in ("round_robin", "least_latency"):
+            raise ValueError(f"Unknown replica strategy: {strategy}")
+        self.engines = engines
+        self.async_engines = async_engines or []
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self.latency = [0.0] * len(engines)
+        self.down_until = [0.0] * len(engines)
+        self._rr = itertools.count()
+        self._lock = threading.Lock()
+
+        for i, eng in enumerate(engines):
+            self._track(eng, i)
+        for i, eng in enumerate(self.async_engines):
+            self._track(eng.sync_engine, i)
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def _track(self, eng: Engine, index: int) -> None:
+        @event.listens_for(eng, "before_cursor_execute")
+        def _start(conn, cursor, statement, params, context, executemany):
+            conn.info["replica_t0"] = time.perf_counter()
+
+        @event.listens_for(eng, "after_cursor_execute")
+        def _end(conn, cursor, statement, params, context, executemany):
+            started = conn.info.pop("replica_t0", None)
+            if started is not None:
+                self._observe(index, time.perf_counter() - started)
+
+        @event.listens_for(eng, "handle_error")
+        def _error(context):
+            # Also fires when opening a connection fails
+            if context.is_disconnect or context.connection is None:
+                self.mark_down(index)
+
+    def _observe(self, index: int, seconds: float) -> None:
+        with self._lock:
+            prev = self.latency[index]
+            self.latency[index] = (
+                seconds if prev == 0.0 else prev + EWMA_ALPHA * (seconds - prev)
+            )
+
+    def mark_down(self, index: int) -> None:
+        with self._lock:
+            if self.down_until[index] <= time.monotonic():
+                log.warning("Replica %d unreachable, reading from the others", index)
+            self.down_until[index] = time.monotonic() + self.retry_after
+
+    def healthy(self) -> list[int]:
+        now = time.monotonic()
+        return [i for i, until in enumerate(self.down_until) if until <= now]
+
+    def pick(self) -> int | None:
+        healthy = self.healthy()
+        if not healthy:
+            return None
+        if self.strategy == "least_latency":
+            return min(healthy, key=self.latency.__getitem__)
+        return healthy[next(self._rr) % len(healthy)]
@@ -1,3 +1,7 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import uvicorn
@@ -6,13 +10,114 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from prometheus_fastapi_instrumentator import Instrumentator   # 👈 ADD THIS
 
+from app.api.admission import AdmissionControl, RouteLimit
+from app.api.deps import db_session, run_db
+from app.api.idempotency import IdempotencyMiddleware
+from app.api.profiling import ProfileRequestMiddleware
+from app.api.query_stats import QueryStatsMiddleware
+from app.api.read_your_writes import ReadYourWritesMiddleware
+from app.api.routes_debug import router as debug_router
+from app.api.routes_public import register_queue
 from app.api.routes_public import router as public_router
 from app.api.routes_students import router as students_router
+from app.core import database
+from app.core.cache import TTLCache, student_cache
 from app.core.config import settings
+from app.services import student_service
+from app.services.change_feed import change_feed
+
+log = logging.getLogger(__name__)
+
+# Give up on warm-up (and start serving cold) after this many seconds, so an
+# unreachable database can't hold startup past the startup probe
+WARM_UP_TIMEOUT = 10.0
+
+
+async def warm_up() -> None:
+    """Open pool connections and compile the hot queries before serving.
+
+    Failures are logged, not raised: a database that is briefly unreachable
+    should cost the first requests their warm-up, not crash-loop the pod.
+    """
+    started = time.perf_counter()
+    warm = settings.DB_POOL_WARM
+    try:
+        async with asyncio.timeout(WARM_UP_TIMEOUT):
+            await database.warm_pools(settings.DB_POOL_SIZE if warm is None else warm)
+            for replica in [None, *range(len(database.replicas.engines))]:
+                async with db_session(replica) as db:
+                    await run_db(db, student_service.warm_statement_cache)
+    except Exception:
+        log.exception("Warm-up failed; connections will be opened on demand")
+        return
+    log.info("Warm-up done in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    database.get_database()
+    await warm_up()
+
+    listener = database.listener
+    if student_cache.enabled:
+        listener.subscribe(
+            student_service.CACHE_CHANNEL, student_service.invalidate_cached
+        )
+        # Invalidations sent while we weren't listening are lost; start clean
+        listener.on_connect(student_cache.clear)
+    if settings.CHANGES_ENABLED:
+        change_feed.start(
+            listener,
+            queue_size=settings.CHANGES_QUEUE_SIZE,
+            max_subscribers=settings.CHANGES_MAX_SUBSCRIBERS,
+        )
+    listener.start()  # no-op when nothing subscribed
+    if settings.REGISTER_GROUP_COMMIT:
+        register_queue.start(
+            max_batch=settings.REGISTER_BATCH_SIZE,
+            linger=settings.REGISTER_LINGER_MS / 1000,
+        )
+    yield
+    await register_queue.stop(timeout=settings.REGISTER_DRAIN_SECONDS)
+    listener.stop()
+    change_feed.stop()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title=settings.APP_NAME)
+    app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+
+    # Innermost, so only requests that reach a handler are counted
+    app.add_middleware(QueryStatsMiddleware)
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(
+            ProfileRequestMiddleware, interval=settings.PROFILE_INTERVAL_MS / 1000
+        )
+
+    # Shed public bursts before they take every DB connection. Added before
+    # the Instrumentator so its middleware (outermost) still counts the
+    # 429/503 responses.
+    app.add_middleware(
+        AdmissionControl,
+        limits={
+            "/public/register": RouteLimit(
+                concurrency=settings.PUBLIC_MAX_CONCURRENCY,
+                queue=settings.PUBLIC_MAX_QUEUE,
+                queue_timeout=settings.PUBLIC_QUEUE_TIMEOUT,
+                rate=settings.PUBLIC_RATE_PER_IP,
+                burst=settings.PUBLIC_BURST_PER_IP,
+            )
+        },
+    )
+    # Outside admission control: replaying a retry costs nothing
+    app.add_middleware(
+        IdempotencyMiddleware,
+        routes={("POST", "/students"), ("POST", "/public/register")},
+        store=TTLCache(
+            "idempotency", settings.IDEMPOTENCY_MAX_KEYS, settings.IDEMPOTENCY_TTL
+        ),
+    )
+    # Outside idempotency, so a replayed response never carries a stale pin
+    app.add_middleware(ReadYourWritesMiddleware)
 
     # 👇 ADD THIS (enable Prometheus metrics)
     Instrumentator().instrument(app).expose(app, endpoint="/metrics", include_in_schema=False)
@@ -20,6 +125,8 @@ def create_app() -> FastAPI:
     # API routes
     app.include_router(students_router)
     app.include_router(public_router)
+    if settings.PROFILING_ENABLED:
+        app.include_router(debug_router)
 
     # Static GUI (end-user registration page)
     base_dir = Path(__file__).resolve().parent
@@ -39,7 +146,21 @@ def create_app() -> FastAPI:
     return app
 
 
-app = create_app()
+def __getattr__(name: str):
+    # `uvicorn app.main:app` and `from app.main import app` still work; the
+    # app is only built when asked for, not on import
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host=settings.HOST, port=settings.PORT, reload=True)
\ No newline at end of file
+    uvicorn.run(
+        "app.main:create_app",
+        factory=True,
+        host=settings.HOST,
+        port=settings.PORT,
+        reload=settings.RELOAD,
+    )
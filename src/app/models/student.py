@@ -30,4 +30,16 @@ class Student(Base):
     )
 
 
-Index("ix_students_name", Student.last_name, Student.first_name)
+# Directory sort key (V5): case-insensitive, byte-ordered so prefixes are ranges
+Index(
+    "ix_students_directory",
+    func.lower(Student.last_name).collate("C"),
+    func.lower(Student.first_name).collate("C"),
+    Student.id,
+    postgresql_include=["last_name", "first_name"],
+)
+
+# search_vector / search_text are GENERATED columns (V3 migration) and are
+# deliberately not mapped; query them through student_search() instead.
+# change_xid (V6, trigger-maintained) isn't mapped either; see
+# student_service.CHANGE_XID.
@@ -1,4 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field
+from datetime import datetime
+from typing import Any, Literal
+
+from pydantic import BaseModel, EmailStr, Field, model_validator
 
 
 class StudentBase(BaseModel):
@@ -17,6 +20,7 @@ class StudentCreate(StudentBase):
 class StudentUpdate(BaseModel):
     first_name: str | None = Field(default=None, min_length=1, max_length=80)
     last_name: str | None = Field(default=None, min_length=1, max_length=80)
+    email: EmailStr | None = None
     phone: str | None = Field(default=None, max_length=32)
     age: int | None = Field(default=None, ge=0, le=130)
     address: str | None = Field(default=None, max_length=255)
@@ -24,6 +28,44 @@ class StudentUpdate(BaseModel):
 
 class StudentOut(StudentBase):
     id: int
+    created_at: datetime
+    updated_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class BulkRowResult(BaseModel):
+    index: int
+    status: Literal["created", "duplicate", "invalid"]
+    id: int | None = None
+    email: str | None = None
+    errors: list[dict[str, Any]] | None = None
+
+
+class BulkResult(BaseModel):
+    created: int = 0
+    duplicate: int = 0
+    invalid: int = 0
+    results: list[BulkRowResult] = []
+
+
+LOOKUP_MAX_ITEMS = 1000
+
+
+class StudentLookup(BaseModel):
+    """Exactly one of ``ids`` / ``emails``."""
+
+    ids: list[int] | None = Field(default=None, max_length=LOOKUP_MAX_ITEMS)
+    emails: list[str] | None = Field(default=None, max_length=LOOKUP_MAX_ITEMS)
+
+    @model_validator(mode="after")
+    def _one_key(self):
+        if (self.ids is None) == (self.emails is None):
+            raise ValueError("Give either ids or emails")
+        return self
+
+
+class StudentLookupResult(BaseModel):
+    students: list[StudentOut]
+    missing: list[int] | list[str]
@@ -0,0 +1,118 @@
+"""Production entry point: gunicorn supervising uvicorn (uvloop + httptools)
+workers, one per CPU of the container's limit by default::
+
+    python -m app.server
+
+``python -m app.main`` stays the single-process development server. Metrics
+from all workers are aggregated through prometheus_client's multiprocess
+mode, so /metrics reports pod totals whichever worker answers the scrape.
+"""
+
+import math
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import ClassVar
+
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+
+from app.core.config import settings
+
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS: ClassVar[dict] = {"loop": "uvloop", "http": "httptools"}
+
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def cpu_limit(cgroup: Path = CGROUP_ROOT) -> int:
+    """CPUs this container may use: the cgroup quota (what k8s sets from
+    resources.limits.cpu), rounded up, else the CPUs we are pinned to."""
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        q, period = (cgroup / "cpu.max").read_text().split()
+        if q != "max":
+            quota = int(q) / int(period)
+    except (OSError, ValueError):
+        try:  # cgroup v1: quota is -1 when unlimited
+            q = int((cgroup / "cpu" / "cpu.cfs_quota_us").read_text())
+            period = int((cgroup / "cpu" / "cpu.cfs_period_us").read_text())
+            if q > 0:
+                quota = q / period
+        except (OSError, ValueError):
+            pass
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:  # macOS
+        cpus = os.cpu_count() or 1
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(cpus, 1)
+
+
+def prepare_multiprocess_dir() -> str:
+    """Point prometheus_client at an empty directory for per-worker files.
+
+    Must run before anything imports prometheus_client. The directory is
+    wiped first: an emptyDir outlives container restarts, and stale files
+    from dead processes would be summed into the totals.
+    """
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(
+        tempfile.gettempdir(), "prometheus-multiproc"
+    )
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    return path
+
+
+def child_exit(server, worker) -> None:
+    # Drop the dead worker's live gauges (pool, cache, admission) from totals
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def options() -> dict:
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": settings.WORKERS or cpu_limit(),
+        "worker_class": Worker,
+        "max_requests": settings.WORKER_MAX_REQUESTS,
+        "max_requests_jitter": settings.WORKER_MAX_REQUESTS_JITTER,
+        "timeout": settings.WORKER_TIMEOUT,
+        "graceful_timeout": settings.WORKER_GRACEFUL_TIMEOUT,
+        "keepalive": settings.KEEPALIVE,
+        "preload_app": settings.PRELOAD_APP,
+        "reuse_port": settings.REUSE_PORT,
+        "child_exit": child_exit,
+        "accesslog": "-",
+    }
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import create_app
+
+        return create_app()
+
+
+def main() -> None:
+    prepare_multiprocess_dir()
+    Server(options()).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import asyncio
+from datetime import datetime
+
+import orjson
+from sqlalchemy.engine import Row
+
+from app.core import metrics
+from app.core.listener import PgListener
+from app.schemas.student import StudentOut
+
+# NOTIFY channel of the V6 trigger: one JSON payload per committed
+# insert/update/delete of a student
+CHANNEL = "student_changes"
+
+_STUDENT_FIELDS = list(StudentOut.model_fields)
+
+
+def _event(
+    op: str, student_id: int, updated_at: datetime, resume: int, student=None
+) -> bytes:
+    """One Server-Sent Event. Its id is the change's resume token, which is
+    what a reconnecting client sends back as Last-Event-ID."""
+    change = {"op": op, "id": student_id, "updated_at": updated_at}
+    if student is not None:
+        change["student"] = student
+    data = orjson.dumps(change, option=orjson.OPT_UTC_Z)
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (resume, op.encode(), data)
+
+
+def resync_event(reason: str) -> bytes:
+    """Tells the client that changes may have been missed, deletes included.
+
+    Updates and inserts come back on resume (Last-Event-ID), but deleted rows
+    can't be read back from the table: a client that must not keep deleted
+    students has to reconcile its copy (e.g. against GET /students). No id,
+    so Last-Event-ID stays at the last change actually delivered.
+    """
+    data = orjson.dumps({"reason": reason})
+    return b"event: resync\ndata: %s\n\n" % data
+
+
+def notify_event(payload: str) -> bytes:
+    """Event for a NOTIFY payload, encoded like the API's own responses
+    (StudentOut field order, UTC timestamps with Z)."""
+    change = orjson.loads(payload)
+    student = change.get("student")
+    if student is not None:
+        student["created_at"] = datetime.fromisoformat(student["created_at"])
+        student["updated_at"] = datetime.fromisoformat(student["updated_at"])
+        student = {name: student[name] for name in _STUDENT_FIELDS}
+    return _event(
+        change["op"],
+        change["id"],
+        datetime.fromisoformat(change["updated_at"]),
+        change["resume"],
+        student,
+    )
+
+
+def row_event(row: Row, floor: int) -> bytes:
+    """Event for a row read back from the table while catching up. The op
+    is inferred: a row never updated since its insert is an insert.
+
+    ``floor`` is the stream's resume_floor(): notifications queued during the
+    catch-up may be older than the row, so the token is the lower of the two.
+    """
+    op = "insert" if row.created_at == row.updated_at else "update"
+    resume = floor if row.change_xid is None else min(row.change_xid, floor)
+    student = {name: getattr(row, name) for name in _STUDENT_FIELDS}
+    return _event(op, row.id, row.updated_at, resume, student)
+
+
+class ChangeFeed:
+    """Fan-out of the process's one LISTEN connection to any number of
+    change stream subscribers.
+
+    The listener thread decodes and encodes each notification once; every
+    subscriber gets the same bytes through its own bounded queue. A
+    subscriber that falls ``queue_size`` events behind is disconnected
+    instead of buffered without limit, and so is everyone when the LISTEN
+    connection is re-established, since notifications in between are lost.
+    Either way the queue ends with the reason (a str instead of an event);
+    the stream then sends a resync event and closes, and the client is
+    expected to reconnect with Last-Event-ID and catch up from the table.
+    """
+
+    def __init__(self, queue_size: int = 1000, max_subscribers: int = 1000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: set[asyncio.Queue[bytes | str]] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        self._gauge = metrics.CHANGE_FEED_SUBSCRIBERS
+        self._events = metrics.CHANGE_FEED_EVENTS
+        self._disconnects = {
+            reason: metrics.CHANGE_FEED_DISCONNECTS.labels(reason=reason)
+            for reason in ("lagging", "reconnect", "shutdown")
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscribers) >= self.max_subscribers
+
+    def start(
+        self,
+        listener: PgListener,
+        queue_size: int | None = None,
+        max_subscribers: int | None = None,
+    ) -> None:
+        """Deliver ``listener``'s notifications on the running event loop.
+        Call before ``listener.start()``, which LISTENs on connect."""
+        if queue_size is not None:
+            self.queue_size = queue_size
+        if max_subscribers is not None:
+            self.max_subscribers = max_subscribers
+        self._loop = asyncio.get_running_loop()
+        listener.subscribe(CHANNEL, self._on_notify)
+        listener.on_connect(self._on_connect)
+
+    def stop(self) -> None:
+        self._close_all("shutdown")
+        self._loop = None
+
+    def subscribe(self) -> asyncio.Queue[bytes | str]:
+        queue: asyncio.Queue[bytes | str] = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        self._gauge.set(len(self._subscribers))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[bytes | str]) -> None:
+        self._subscribers.discard(queue)
+        self._gauge.set(len(self._subscribers))
+
+    # Listener thread
+    def _on_notify(self, payload: str) -> None:
+        self._events.inc()
+        event = notify_event(payload)
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._publish, event)
+
+    def _on_connect(self) -> None:
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._close_all, "reconnect")
+
+    # Event loop
+    def _publish(self, event: bytes) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._close(queue, "lagging")
+
+    def _close_all(self, reason: str) -> None:
+        for queue in list(self._subscribers):
+            self._close(queue, reason)
+
+    def _close(self, queue: asyncio.Queue[bytes | str], reason: str) -> None:
+        # The client replays whatever is still queued when it resumes
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(reason)
+        self.unsubscribe(queue)
+        self._disconnects[reason].inc()
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar
+
+from app.core import metrics
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+log = logging.getLogger(__name__)
+
+
+class GroupCommitter(Generic[T, R]):
+    """Coalesce concurrent single-row writes into one batch per commit.
+
+    Callers ``await submit(item)``; a background task collects up to
+    ``max_batch`` items, waiting at most ``linger`` seconds after the first
+    one, hands them to ``flush`` (which returns one result per item, in
+    order) and resolves each caller with its own result. While a batch is
+    being written the next one accumulates, so batches grow with load and
+    the database pays one WAL flush per batch instead of per row.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[list[T]], Awaitable[list[R]]],
+        max_batch: int = 100,
+        linger: float = 0.005,
+        max_queue: int | None = None,
+    ):
+        self.name = name
+        self._flush = flush
+        self.max_batch = max_batch
+        self.linger = linger
+        self._max_queue = max_queue
+        self._queue: asyncio.Queue[tuple[T, asyncio.Future]] | None = None
+        self._task: asyncio.Task | None = None
+        self._batch: list[tuple[T, asyncio.Future]] = []
+
+        self._batch_size = metrics.GROUP_COMMIT_BATCH_SIZE.labels(queue=name)
+        self._queue_depth = metrics.GROUP_COMMIT_QUEUE_DEPTH.labels(queue=name)
+        self._wait = metrics.GROUP_COMMIT_WAIT.labels(queue=name)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, max_batch: int | None = None, linger: float | None = None) -> None:
+        """Start the writer task on the running event loop, optionally with a
+        new ``max_batch``/``linger`` (e.g. from settings read at startup)."""
+        if self.running:
+            return
+        if max_batch is not None:
+            self.max_batch = max_batch
+        if linger is not None:
+            self.linger = linger
+        # Bounded, so a stalled database pushes back on submitters
+        self._queue = asyncio.Queue(maxsize=self._max_queue or self.max_batch * 10)
+        self._full = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name=f"group-commit-{self.name}")
+
+    async def stop(self, timeout: float | None = None) -> None:
+        """Write out everything already queued, then stop.
+
+        Gives up after ``timeout`` seconds (e.g. a database that stopped
+        answering): the batch being written and everything still queued then
+        fail with RuntimeError instead of leaving their callers hanging.
+        """
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except TimeoutError:
+            log.warning(
+                "Group commit %r not drained after %.1fs; failing %d pending",
+                self.name,
+                timeout,
+                len(self._batch) + self._queue.qsize(),
+            )
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        pending = [fut for _, fut in self._batch]
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait()[1])
+            self._queue.task_done()
+        self._batch = []
+        for fut in pending:
+            if not fut.done():
+                fut.set_exception(RuntimeError(f"Group commit {self.name} stopped"))
+
+    async def submit(self, item: T) -> R:
+        if not self.running:
+            raise RuntimeError(f"Group commit {self.name} is not running")
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        started = loop.time()
+        await self._queue.put((item, fut))
+        if self._queue.qsize() + 1 >= self.max_batch:
+            self._full.set()
+        try:
+            return await fut
+        finally:
+            self._wait.observe(loop.time() - started)
+
+    async def _next_batch(self) -> list[tuple[T, asyncio.Future]]:
+        # Kept on self so stop() can fail it if cancelled mid-batch
+        batch = self._batch = [await self._queue.get()]
+        self._queue_depth.observe(self._queue.qsize() + 1)
+
+        # Linger for more unless a full batch is already waiting. Waits on an
+        # Event rather than wait_for(queue.get()), which can drop an item when
+        # the timeout races a put.
+        if self._queue.qsize() + 1 < self.max_batch and self.linger > 0:
+            self._full.clear()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.linger)
+            except TimeoutError:
+                pass
+
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            self._batch_size.observe(len(batch))
+            try:
+                results: list[Any] = await self._flush([item for item, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+            else:
+                for (_, fut), result in zip(batch, results):
+                    # The caller may have gone away (client disconnect)
+                    if not fut.done():
+                        fut.set_result(result)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            # Not reached when stop() cancels mid-flush: it fails the batch
+            self._batch = []
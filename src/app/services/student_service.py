@@ -1,72 +1,454 @@
 # app/services/student_service.py
+import string
+from collections.abc import Iterator
+from datetime import datetime
+
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from sqlalchemy import select, or_
+from sqlalchemy import (
+    ARRAY,
+    BigInteger,
+    Text,
+    any_,
+    cast,
+    delete,
+    func,
+    literal_column,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import CITEXT
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from app.core.cache import (
+    directory_letters_cache,
+    student_cache,
+    student_email_cache,
+)
 from app.models.student import Student
-from app.schemas.student import StudentCreate, StudentUpdate
+from app.schemas.student import StudentCreate, StudentOut, StudentUpdate
+
+
+# Writes below are single Core statements with RETURNING: the database
+# answers "did it exist / did it conflict" in the same round trip that does the
+# work, instead of a SELECT before and a refresh after.
+STUDENTS = Student.__table__
+
+# NOTIFY channel carrying ids of updated/deleted students, so every pod drops
+# them from its cache (see app.main for the LISTEN side)
+CACHE_CHANNEL = "student_cache_invalidate"
+
+# Exactly the StudentOut fields, in its order: list/search rows are encoded
+# as-is (see RowsResponse) and must match what response_model would produce.
+# Every row read or returned here, cached ones included, has this shape.
+OUT_COLUMNS = tuple(STUDENTS.c[name] for name in StudentOut.model_fields)
+
+
+def _notifying(stmt):
+    """Wrap an UPDATE/DELETE ... RETURNING so the same statement also sends
+    the cache invalidation NOTIFY (delivered on commit, only if it commits)."""
+    changed = stmt.cte("changed")
+    # pg_notify() returns void, which is never NULL: the filter keeps every
+    # row and only makes the NOTIFY run, without adding a column to the rows
+    return select(changed).where(
+        func.pg_notify(CACHE_CHANNEL, cast(changed.c.id, Text)).is_not(None)
+    )
+
+
+def invalidate_cached(payload: str) -> None:
+    """LISTEN handler: payload is the student id."""
+    student_cache.invalidate(int(payload))
+
 
+def _cache_row(row: Row, generation: int) -> None:
+    """Cache a row read (or written) after ``student_cache.generation`` was
+    ``generation``; skipped if an invalidation was handled since."""
+    student_cache.set(row.id, row, generation)
+    # Unguarded: lookups check the cached row's email anyway
+    student_email_cache.set(row.email, row.id)
 
-def create_student(db: Session, payload: StudentCreate) -> Student:
-    student = Student(**payload.model_dump())
-    db.add(student)
+
+def create_student(db: Session, payload: StudentCreate) -> Row | None:
+    """INSERT ... ON CONFLICT (email) DO NOTHING RETURNING the new row.
+
+    Returns ``None`` when the email is already taken.
+    """
+    stmt = (
+        pg_insert(STUDENTS)
+        .values(**payload.model_dump())
+        .on_conflict_do_nothing(index_elements=[STUDENTS.c.email])
+        .returning(*OUT_COLUMNS)
+    )
+    row = db.execute(stmt).first()
+    db.commit()
+    return row
+
+
+def bulk_create_students(
+    db: Session, payloads: list[StudentCreate]
+) -> list[Row | None]:
+    """Insert a batch with one multi-row INSERT and a single commit.
+
+    Returns the new row for each payload, in order, or ``None`` where the
+    email already existed (in the table or earlier in the same batch).
+    """
+    if not payloads:
+        return []
+
+    # Core (not ORM) executemany: SQLAlchemy's insertmanyvalues batches it into
+    # multi-row VALUES with a cached compiled statement.
+    stmt = (
+        pg_insert(STUDENTS)
+        .on_conflict_do_nothing(index_elements=[STUDENTS.c.email])
+        .returning(*OUT_COLUMNS)
+    )
+    rows = db.execute(stmt, [p.model_dump() for p in payloads])
+    created = {row.email.lower(): row for row in rows}
     db.commit()
-    db.refresh(student)
-    return student
 
+    # Rows are inserted in VALUES order, so the first occurrence owns the row
+    return [created.pop(p.email.lower(), None) for p in payloads]
+
+
+def get_student(db: Session, student_id: int) -> Row | None:
+    row = student_cache.get(student_id)
+    if row is None:
+        generation = student_cache.generation
+        stmt = select(*OUT_COLUMNS).where(STUDENTS.c.id == student_id)
+        row = db.execute(stmt).first()
+        if row is not None:
+            _cache_row(row, generation)
+    return row
+
+
+def get_student_by_email(db: Session, email: str) -> Row | None:
+    student_id = student_email_cache.get(email)
+    if student_id is not None:
+        row = student_cache.get(student_id)
+        # The email may have changed since it was indexed
+        if row is not None and row.email == email:
+            return row
+
+    generation = student_cache.generation
+    row = db.execute(select(*OUT_COLUMNS).where(STUDENTS.c.email == email)).first()
+    if row is not None:
+        _cache_row(row, generation)
+    return row
 
-def get_student(db: Session, student_id: int) -> Student | None:
-    return db.get(Student, student_id)
 
+def get_students(db: Session, ids: list[int]) -> dict[int, Row]:
+    """Rows for many ids, keyed by id; missing ids are simply absent.
 
-def get_student_by_email(db: Session, email: str) -> Student | None:
-    stmt = select(Student).where(Student.email == email)
-    return db.execute(stmt).scalars().first()
+    Served from the per-id cache where possible; the rest is one
+    ``id = ANY(:ids)`` query, a single statement whatever the count. The
+    array is bigint[] like the column: ids past int4 would overflow int[].
+    """
+    found = {}
+    for student_id in ids:
+        row = student_cache.get(student_id)
+        if row is not None:
+            found[student_id] = row
+    todo = [i for i in ids if i not in found]
+    if todo:
+        generation = student_cache.generation
+        stmt = select(*OUT_COLUMNS).where(
+            STUDENTS.c.id == any_(cast(todo, ARRAY(BigInteger)))
+        )
+        for row in db.execute(stmt):
+            _cache_row(row, generation)
+            found[row.id] = row
+    return found
+
+
+def get_students_by_email(db: Session, emails: list[str]) -> dict[str, Row]:
+    """Like :func:`get_students`, keyed by (already normalized) email.
+
+    The array is citext[] like the column, so the comparison is citext =
+    citext: case-insensitive and served by the unique index. A varchar[]
+    would compare as text, case-sensitively and with a seq scan.
+    """
+    found = {}
+    for email in emails:
+        student_id = student_email_cache.get(email)
+        row = student_cache.get(student_id) if student_id is not None else None
+        if row is not None and row.email == email:
+            found[email] = row
+    todo = [e for e in emails if e not in found]
+    if todo:
+        generation = student_cache.generation
+        stmt = select(*OUT_COLUMNS).where(
+            STUDENTS.c.email == any_(cast(todo, ARRAY(CITEXT)))
+        )
+        for row in db.execute(stmt):
+            _cache_row(row, generation)
+            found[row.email] = row
+    return found
 
 
-def list_students(db: Session, limit: int = 50, offset: int = 0) -> list[Student]:
-    stmt = select(Student).order_by(Student.id.desc()).limit(limit).offset(offset)
-    return list(db.execute(stmt).scalars().all())
+def list_students(
+    db: Session,
+    limit: int = 50,
+    offset: int = 0,
+    after: int | None = None,
+    before: int | None = None,
+) -> list[Row]:
+    """Newest-first page of students, as plain rows (no ORM entities).
 
+    ``after``/``before`` are keyset bounds on ``id`` and take precedence over
+    ``offset``: they seek straight into the primary key index, so every page
+    costs the same no matter how deep it is.
+    """
+    stmt = select(*OUT_COLUMNS)
+    if after is not None:
+        stmt = stmt.where(STUDENTS.c.id < after).order_by(STUDENTS.c.id.desc())
+    elif before is not None:
+        stmt = stmt.where(STUDENTS.c.id > before).order_by(STUDENTS.c.id.asc())
+    else:
+        stmt = stmt.order_by(STUDENTS.c.id.desc()).offset(offset)
 
-def search_students(
-    db: Session, q: str, limit: int = 50, offset: int = 0
-) -> list[Student]:
-    like = f"%{q.strip()}%"
+    rows = list(db.execute(stmt.limit(limit)).all())
+    if before is not None:
+        rows.reverse()
+    return rows
+
+
+def search_students(db: Session, q: str, limit: int = 50, offset: int = 0) -> list[Row]:
+    """Relevance-ranked search via the ``student_search()`` SQL function (V3).
+
+    Prefix matches on names/email/phone/address plus substring matches, both
+    served by GIN indexes; the admin CLI calls the same function.
+    """
+    hits = (
+        func.student_search(q.strip())
+        .table_valued("student_id", "rank")
+        .render_derived(name="hits")
+    )
     stmt = (
-        select(Student)
-        .where(
-            or_(
-                Student.first_name.ilike(like),
-                Student.last_name.ilike(like),
-                Student.email.ilike(like),
-                Student.phone.ilike(like),
-                Student.address.ilike(like),
+        select(*OUT_COLUMNS)
+        .join(hits, hits.c.student_id == STUDENTS.c.id)
+        .order_by(hits.c.rank.desc(), STUDENTS.c.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return list(db.execute(stmt).all())
+
+
+# Directory sort key: exactly the ix_students_directory expressions (V5), or
+# the planner falls back to sorting
+LAST_KEY = func.lower(STUDENTS.c.last_name).collate("C")
+FIRST_KEY = func.lower(STUDENTS.c.first_name).collate("C")
+DIRECTORY_KEY = tuple_(LAST_KEY, FIRST_KEY, STUDENTS.c.id)
+
+
+def _prefix_range(prefix: str) -> tuple[str, str]:
+    """[low, high) of the byte-ordered keys starting with ``prefix``."""
+    low = prefix.lower()
+    return low, low[:-1] + chr(ord(low[-1]) + 1)
+
+
+def directory_page(
+    db: Session,
+    limit: int = 50,
+    last_name_prefix: str | None = None,
+    after: tuple[str, str, int] | None = None,
+    before: tuple[str, str, int] | None = None,
+) -> list[Row]:
+    """Alphabetical page (last name, first name, id), case-insensitive.
+
+    Rows are the OUT_COLUMNS plus ``last_key``/``first_key`` for the next
+    cursor. The prefix and the ``after``/``before`` keyset bounds are ranges
+    of ix_students_directory, so a page is one index scan in key order at any
+    depth.
+    """
+    stmt = select(
+        *OUT_COLUMNS, LAST_KEY.label("last_key"), FIRST_KEY.label("first_key")
+    )
+    if last_name_prefix:
+        low, high = _prefix_range(last_name_prefix)
+        # The lower bound as a row comparison: with a plain LAST_KEY >= low
+        # the planner sorts narrow prefixes instead of reading them in order
+        stmt = stmt.where(DIRECTORY_KEY >= tuple_(low, "", 0), LAST_KEY < high)
+
+    if after is not None:
+        stmt = stmt.where(DIRECTORY_KEY > tuple_(*after))
+    elif before is not None:
+        stmt = stmt.where(DIRECTORY_KEY < tuple_(*before))
+    if before is not None:
+        stmt = stmt.order_by(LAST_KEY.desc(), FIRST_KEY.desc(), STUDENTS.c.id.desc())
+    else:
+        stmt = stmt.order_by(LAST_KEY, FIRST_KEY, STUDENTS.c.id)
+
+    rows = list(db.execute(stmt.limit(limit)).all())
+    if before is not None:
+        rows.reverse()
+    return rows
+
+
+def directory_letters(db: Session) -> dict[str, int]:
+    """Students per initial of the last name, A-Z, for jump navigation.
+
+    One statement of 26 counts, each an index-only range scan; cached for
+    DIRECTORY_LETTERS_TTL since it touches every row.
+    """
+    counts = directory_letters_cache.get("letters")
+    if counts is None:
+        stmt = select(
+            *(
+                select(func.count())
+                .where(LAST_KEY >= low, LAST_KEY < high)
+                .scalar_subquery()
+                .label(low)
+                for low, high in map(_prefix_range, string.ascii_lowercase)
             )
         )
-        .order_by(Student.id.desc())
+        row = db.execute(stmt).one()
+        counts = {letter.upper(): n for letter, n in row._asdict().items()}
+        directory_letters_cache.set("letters", counts)
+    return counts
+
+
+def warm_statement_cache(db: Session) -> None:
+    """Run each hot read once, matching nothing, so its compiled form is in
+    the engine's statement cache before the first request needs it."""
+    get_student(db, 0)
+    get_student_by_email(db, "warm-up@invalid")
+    list_students(db)
+    list_students(db, after=0)
+    list_students(db, before=0)
+    search_students(db, "warm-up")
+    directory_page(db)
+    db.rollback()
+
+
+# Transaction id of a row's last change, set by the V6 trigger; not mapped on
+# Student, like the search columns
+CHANGE_XID = literal_column("students.change_xid", BigInteger)
+CHANGE_COLUMNS = (*OUT_COLUMNS, CHANGE_XID.label("change_xid"))
+
+
+def resume_floor(db: Session) -> int:
+    """The xmin of a fresh snapshot: every transaction that commits from now
+    on has change_xid >= this, so it is a safe GET /students/changes resume
+    token for anything not yet delivered."""
+    xmin = func.pg_snapshot_xmin(func.pg_current_snapshot())
+    return db.execute(select(cast(cast(xmin, Text), BigInteger))).scalar_one()
+
+
+def changed_after(db: Session, after: tuple[int, int], limit: int = 500) -> list[Row]:
+    """Rows written by transactions from ``after`` = (change_xid, id) on, in
+    that order: resuming GET /students/changes from a token, a range of
+    ix_students_change_xid (V6). Deleted rows are gone and cannot be
+    replayed."""
+    stmt = (
+        select(*CHANGE_COLUMNS)
+        .where(
+            tuple_(CHANGE_XID, STUDENTS.c.id)
+            > tuple_(*after, types=[BigInteger, BigInteger])
+        )
+        .order_by(CHANGE_XID, STUDENTS.c.id)
+        .limit(limit)
+    )
+    return list(db.execute(stmt).all())
+
+
+def changed_since(
+    db: Session, after: tuple[datetime, int], limit: int = 500
+) -> list[Row]:
+    """Rows written after ``after`` = (updated_at, id), oldest first: a
+    ``?since=`` catch-up of GET /students/changes, a range of
+    ix_students_updated_at (V6)."""
+    key = tuple_(STUDENTS.c.updated_at, STUDENTS.c.id)
+    stmt = (
+        select(*CHANGE_COLUMNS)
+        .where(key > tuple_(*after))
+        .order_by(STUDENTS.c.updated_at, STUDENTS.c.id)
         .limit(limit)
-        .offset(offset)
     )
-    return list(db.execute(stmt).scalars().all())
+    return list(db.execute(stmt).all())
+
+
+EXPORT_COLUMNS = (
+    Student.id,
+    Student.first_name,
+    Student.last_name,
+    Student.email,
+    Student.phone,
+    Student.age,
+    Student.address,
+    Student.created_at,
+    Student.updated_at,
+)
+
 
+def stream_students(
+    db: Session, updated_since: datetime | None = None, batch_size: int = 1000
+) -> Iterator[Row]:
+    """Yield plain rows from a server-side cursor, ``batch_size`` at a time.
 
-def update_student(db: Session, student: Student, payload: StudentUpdate) -> Student:
+    No ORM entities or identity map, so memory stays flat for any table size.
+    """
+    stmt = select(*EXPORT_COLUMNS).order_by(Student.id)
+    if updated_since is not None:
+        stmt = stmt.where(Student.updated_at >= updated_since)
+    yield from db.execute(stmt, execution_options={"yield_per": batch_size})
+
+
+def _target(student_id: int, versions: list[datetime] | None):
+    """WHERE clause for a write, optionally conditional on updated_at
+    (If-Match), so the check and the write are one atomic statement."""
+    cond = STUDENTS.c.id == student_id
+    if versions is not None:
+        cond = cond & STUDENTS.c.updated_at.in_(versions)
+    return cond
+
+
+def update_student(
+    db: Session,
+    student_id: int,
+    payload: StudentUpdate,
+    versions: list[datetime] | None = None,
+) -> Row | None:
+    """UPDATE ... RETURNING the new row.
+
+    ``None`` if the id doesn't exist or, when ``versions`` is given, its
+    updated_at is not one of them. A duplicate email raises IntegrityError
+    from the unique index.
+    """
     data = payload.model_dump(exclude_unset=True)
 
-    # If payload had only unknown fields or empty JSON, nothing to do
+    # Empty patch: nothing to write, but still answer 404 vs current row
     if not data:
-        return student
-
-    # Explicitly set allowed fields
-    for field in ("first_name", "last_name", "email", "phone", "age", "address"):
-        if field in data:
-            setattr(student, field, data[field])
+        return db.execute(
+            select(*OUT_COLUMNS).where(_target(student_id, versions))
+        ).first()
 
+    stmt = (
+        update(STUDENTS)
+        .where(_target(student_id, versions))
+        # Leave updated_at to the V2 trigger, which only bumps it when the row
+        # actually changes (the column's onupdate would bump it every time)
+        .values(**data, updated_at=STUDENTS.c.updated_at)
+        .returning(*OUT_COLUMNS)
+    )
+    generation = student_cache.generation
+    row = db.execute(_notifying(stmt)).first()
     db.commit()
-    db.refresh(student)
-    return student
+    if row is not None:
+        _cache_row(row, generation)
+    return row
 
 
-def delete_student(db: Session, student: Student) -> None:
-    db.delete(student)
+def delete_student(
+    db: Session, student_id: int, versions: list[datetime] | None = None
+) -> bool:
+    """DELETE ... RETURNING id; False if there was nothing (matching) to
+    delete."""
+    stmt = (
+        delete(STUDENTS).where(_target(student_id, versions)).returning(STUDENTS.c.id)
+    )
+    deleted = db.execute(_notifying(stmt)).first() is not None
     db.commit()
+    if deleted:
+        student_cache.invalidate(student_id)
+    return deleted
@@ -0,0 +1,129 @@
+"""Benchmark suite for student_service and the HTTP routes.
+
+Opt-in: needs a throwaway Postgres (the students table is truncated and
+re-seeded) and pytest-benchmark (src/requirements-dev.txt)::
+
+    BENCH_DATABASE_URL=postgresql+psycopg://user:pw@localhost:5432/bench \
+    BENCH_ROWS=100000 \
+    pytest src/tests/benchmarks --benchmark-json=bench.json
+
+Missing migrations are applied from apps/student-reg/db/migrations. Compare
+two runs with ``python scripts/bench_compare.py base.json bench.json``.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+BENCH_URL = os.environ.get("BENCH_DATABASE_URL")
+ROWS = int(os.environ.get("BENCH_ROWS", "10000"))
+
+if not BENCH_URL:
+    collect_ignore_glob = ["test_*.py"]
+else:
+    pytest.importorskip("pytest_benchmark")
+    os.environ["DATABASE_URL"] = BENCH_URL
+    # Measure the database path, not the in-process cache or the limits
+    os.environ.setdefault("STUDENT_CACHE_SIZE", "0")
+    os.environ.setdefault("PUBLIC_RATE_PER_IP", "0")
+    os.environ.setdefault("PUBLIC_MAX_CONCURRENCY", "0")
+
+MIGRATIONS = Path(__file__).resolve().parents[3] / "apps/student-reg/db/migrations"
+SEED_EMAIL = "seed%@bench.example.com"
+
+# Spread of common names so search has realistic selectivity
+FIRST_NAMES = ["Maria", "James", "Aisha", "Chen", "Olga", "Diego", "Fatima", "Liam"]
+LAST_NAMES = [
+    "Smith",
+    "Garcia",
+    "Nguyen",
+    "Okafor",
+    "Ivanova",
+    "Kim",
+    "Rossi",
+    "Haddad",
+]
+
+
+def _migrate(conn) -> None:
+    for path in sorted(
+        MIGRATIONS.glob("V*.sql"), key=lambda p: int(p.name[1:].split("__")[0])
+    ):
+        conf = path.with_name(path.name + ".conf")
+        if conf.exists() and "executeInTransaction=false" in conf.read_text():
+            # One statement per round trip: a multi-statement string runs as
+            # one implicit transaction, which CONCURRENTLY refuses
+            for statement in path.read_text().split(";\n"):
+                if statement.strip():
+                    conn.execute(statement)
+        else:
+            conn.execute(path.read_text())
+
+
+@pytest.fixture(scope="session")
+def seeded() -> int:
+    """Make sure exactly ROWS seed students exist, ids 1..ROWS."""
+    import psycopg
+
+    from app.core.database import psycopg_dsn
+
+    with psycopg.connect(psycopg_dsn(BENCH_URL), autocommit=True) as conn:
+        if conn.execute("SELECT to_regclass('students')").fetchone()[0] is None:
+            _migrate(conn)
+
+        # Rows written by earlier benchmark runs
+        conn.execute("DELETE FROM students WHERE email NOT LIKE %s", (SEED_EMAIL,))
+        count, max_id = conn.execute(
+            "SELECT count(*), max(id) FROM students"
+        ).fetchone()
+        if count != ROWS or max_id != ROWS:
+            conn.execute("TRUNCATE students RESTART IDENTITY")
+            conn.execute(
+                """
+                INSERT INTO students (first_name, last_name, email, phone, age, address)
+                SELECT (%(first)s::text[])[1 + i %% 8],
+                       (%(last)s::text[])[1 + (i / 8) %% 8],
+                       'seed' || i || '@bench.example.com',
+                       '+1555' || lpad(i::text, 7, '0'),
+                       18 + i %% 40,
+                       i || ' Campus Road'
+                FROM generate_series(1, %(rows)s) AS i
+                """,
+                {"first": FIRST_NAMES, "last": LAST_NAMES, "rows": ROWS},
+            )
+            conn.execute("VACUUM ANALYZE students")
+    return ROWS
+
+
+@pytest.fixture
+def db(seeded):
+    from app.core.database import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def client(seeded):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def admin_headers():
+    from app.core.config import settings
+
+    return {"X-API-Key": settings.ADMIN_API_KEY}
+
+
+@pytest.fixture
+def unique_email():
+    """Factory for emails that never collide with seeds or earlier calls."""
+    counter = iter(range(10**9))
+    run = os.urandom(4).hex()
+    return lambda: f"bench-{run}-{next(counter)}@bench.example.com"
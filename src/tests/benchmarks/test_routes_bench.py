@@ -0,0 +1,144 @@
+"""End-to-end route timings through TestClient (in-process ASGI, no network)."""
+
+import pytest
+
+from app.api.pagination import encode_cursor
+
+
+def _ok(response, status=200):
+    assert response.status_code == status, response.text
+    return response
+
+
+def test_post_students(benchmark, client, admin_headers, unique_email):
+    benchmark(
+        lambda: _ok(
+            client.post(
+                "/students",
+                json={
+                    "first_name": "Bench",
+                    "last_name": "Mark",
+                    "email": unique_email(),
+                },
+                headers=admin_headers,
+            )
+        )
+    )
+
+
+def test_post_public_register(benchmark, client, unique_email):
+    benchmark(
+        lambda: _ok(
+            client.post(
+                "/public/register",
+                json={
+                    "first_name": "Bench",
+                    "last_name": "Mark",
+                    "email": unique_email(),
+                },
+            ),
+            201,
+        )
+    )
+
+
+def test_post_students_bulk_100(benchmark, client, admin_headers, unique_email):
+    def setup():
+        body = [
+            {"first_name": "Bench", "last_name": "Mark", "email": unique_email()}
+            for _ in range(100)
+        ]
+        return (body,), {}
+
+    benchmark.pedantic(
+        lambda body: _ok(
+            client.post("/students/bulk", json=body, headers=admin_headers)
+        ),
+        setup=setup,
+        rounds=20,
+    )
+
+
+def test_get_student(benchmark, client, seeded):
+    benchmark(lambda: _ok(client.get(f"/students/{seeded // 2}")))
+
+
+def test_get_student_not_modified(benchmark, client, seeded):
+    etag = _ok(client.get(f"/students/{seeded // 2}")).headers["etag"]
+    benchmark(
+        lambda: _ok(
+            client.get(f"/students/{seeded // 2}", headers={"If-None-Match": etag}), 304
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["", "offset={deep}", "after={cursor}", "q=garcia", "q=mar"],
+    ids=["first_page", "offset90pct", "keyset90pct", "search_name", "search_prefix"],
+)
+def test_list_students(benchmark, client, seeded, query):
+    deep = int(seeded * 0.9)
+    query = query.format(deep=deep, cursor=encode_cursor({"id": seeded - deep}))
+    benchmark(lambda: _ok(client.get(f"/students?limit=50&{query}")))
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["", "last_name_prefix=Ok", "after={cursor}"],
+    ids=["first_page", "prefix", "keyset"],
+)
+def test_directory(benchmark, client, seeded, query):
+    cursor = encode_cursor({"last": "nguyen", "first": "", "id": 0})
+    query = query.format(cursor=cursor)
+    benchmark(lambda: _ok(client.get(f"/students/directory?limit=50&{query}")))
+
+
+def test_directory_letters(benchmark, client, seeded):
+    benchmark(lambda: _ok(client.get("/students/directory/letters")))
+
+
+def test_lookup_200_ids(benchmark, client, seeded):
+    ids = list(range(1, seeded, seeded // 200))[:200]
+    response = benchmark(
+        lambda: _ok(client.post("/students/lookup", json={"ids": ids}))
+    )
+    assert len(response.json()["students"]) == len(ids)
+
+
+def test_patch_student(benchmark, client, admin_headers, seeded):
+    ages = iter(range(10**9))
+    benchmark(
+        lambda: _ok(
+            client.patch(
+                f"/students/{seeded // 3}",
+                json={"age": 18 + next(ages) % 40},
+                headers=admin_headers,
+            )
+        )
+    )
+
+
+def test_delete_student(benchmark, client, admin_headers, unique_email):
+    def setup():
+        created = client.post(
+            "/students",
+            json={"first_name": "Bench", "last_name": "Mark", "email": unique_email()},
+            headers=admin_headers,
+        )
+        return (_ok(created).json()["id"],), {}
+
+    benchmark.pedantic(
+        lambda sid: _ok(client.delete(f"/students/{sid}", headers=admin_headers)),
+        setup=setup,
+        rounds=50,
+    )
+
+
+def test_export_ndjson(benchmark, client, admin_headers):
+    benchmark.pedantic(
+        lambda: _ok(
+            client.get("/students/export?format=ndjson", headers=admin_headers)
+        ),
+        rounds=3,
+    )
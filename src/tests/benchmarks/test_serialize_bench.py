@@ -0,0 +1,63 @@
+"""Serialization cost of one full list page, database excluded.
+
+``orm_response_model`` is the path list/search used to take: ORM entities
+validated against ``list[StudentOut]`` by FastAPI and dumped with json.
+``rows_orjson`` is the current one: Core rows straight into orjson. Both are
+reported as rows/sec in ``extra_info``.
+"""
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_model_field
+from sqlalchemy import select
+
+from app.api.routes_students import RowsResponse
+from app.models.student import Student
+from app.schemas.student import StudentOut
+from app.services import student_service
+
+PAGE = 200
+
+
+@pytest.fixture(scope="module")
+def field():
+    return create_model_field("Response_list", list[StudentOut], mode="serialization")
+
+
+@pytest.fixture
+def orm_page(db):
+    return list(
+        db.execute(select(Student).order_by(Student.id.desc()).limit(PAGE)).scalars()
+    )
+
+
+@pytest.fixture
+def row_page(db):
+    return student_service.list_students(db, limit=PAGE)
+
+
+def _response_model_body(field, content) -> bytes:
+    # The validate + dump steps of fastapi.routing.serialize_response
+    value, errors = field.validate(content, {}, loc=("response",))
+    assert not errors
+    return JSONResponse(field.serialize(value, mode="json", by_alias=True)).body
+
+
+def _rate(benchmark):
+    if benchmark.stats:  # None under --benchmark-disable
+        benchmark.extra_info["rows_per_sec"] = round(PAGE / benchmark.stats.stats.mean)
+
+
+def test_orm_response_model(benchmark, field, orm_page):
+    body = benchmark(_response_model_body, field, orm_page)
+    _rate(benchmark)
+    assert body.count(b'"id":') == PAGE
+
+
+def test_rows_orjson(benchmark, field, row_page, orm_page):
+    body = benchmark(lambda: RowsResponse([row._asdict() for row in row_page]).body)
+    _rate(benchmark)
+    assert body.count(b'"id":') == PAGE
+
+    # Same document as the response_model path, byte for byte
+    assert body == _response_model_body(field, orm_page)
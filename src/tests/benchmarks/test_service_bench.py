@@ -0,0 +1,70 @@
+import pytest
+
+from app.schemas.student import StudentCreate, StudentUpdate
+from app.services import student_service
+
+
+def _payload(email: str) -> StudentCreate:
+    return StudentCreate(first_name="Bench", last_name="Mark", email=email, age=21)
+
+
+def test_create_student(benchmark, db, unique_email):
+    benchmark(lambda: student_service.create_student(db, _payload(unique_email())))
+
+
+def test_bulk_create_1000(benchmark, db, unique_email):
+    def setup():
+        return ([_payload(unique_email()) for _ in range(1000)],), {}
+
+    benchmark.pedantic(
+        lambda payloads: student_service.bulk_create_students(db, payloads),
+        setup=setup,
+        rounds=5,
+    )
+
+
+def test_get_student(benchmark, db, seeded):
+    row = benchmark(student_service.get_student, db, seeded // 2)
+    assert row is not None
+
+
+@pytest.mark.parametrize(
+    "depth", [0, 0.5, 0.9], ids=["offset0", "offset50pct", "offset90pct"]
+)
+def test_list_students_offset(benchmark, db, seeded, depth):
+    offset = int(seeded * depth)
+    rows = benchmark(student_service.list_students, db, limit=50, offset=offset)
+    assert len(rows) == 50
+
+
+@pytest.mark.parametrize("depth", [0.5, 0.9], ids=["keyset50pct", "keyset90pct"])
+def test_list_students_keyset(benchmark, db, seeded, depth):
+    after = seeded - int(seeded * depth)
+    rows = benchmark(student_service.list_students, db, limit=50, after=after)
+    assert len(rows) == 50
+
+
+@pytest.mark.parametrize("q", ["garcia", "mar", "seed12", "nomatchxyz"])
+def test_search_students(benchmark, db, q):
+    benchmark(student_service.search_students, db, q, limit=50)
+
+
+def test_update_student(benchmark, db, seeded):
+    ages = iter(range(10**9))
+    benchmark(
+        lambda: student_service.update_student(
+            db, seeded // 3, StudentUpdate(age=18 + next(ages) % 40)
+        )
+    )
+
+
+def test_stream_students_10k(benchmark, db):
+    def drain():
+        n = 0
+        for n, _ in enumerate(student_service.stream_students(db), start=1):
+            if n == 10_000:
+                break
+        db.rollback()  # close the server-side cursor
+        return n
+
+    benchmark.pedantic(drain, rounds=5)
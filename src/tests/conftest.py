@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+# Settings need a DATABASE_URL to import; unit tests never connect to it
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg://localhost/test")
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start and end every test with empty process-wide caches."""
+    # Imported here, not at the top: app settings are read on import, after
+    # the benchmarks' conftest has pointed DATABASE_URL at its database
+    from app.core.cache import (
+        directory_letters_cache,
+        student_cache,
+        student_email_cache,
+    )
+
+    caches = (student_cache, student_email_cache, directory_letters_cache)
+    for cache in caches:
+        cache.clear()
+    yield
+    for cache in caches:
+        cache.clear()
@@ -0,0 +1,76 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.admission import AdmissionControl, RouteLimit
+
+
+def make_app(limit: RouteLimit) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(AdmissionControl, limits={"/slow": limit})
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    @app.get("/other")
+    async def other():
+        return {"ok": True}
+
+    return app
+
+
+async def _get_many(app: FastAPI, path: str, n: int) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+        return await asyncio.gather(*(c.get(path) for _ in range(n)))
+
+
+def test_rate_limit_per_client():
+    app = make_app(RouteLimit(rate=1, burst=2))
+    responses = asyncio.run(_get_many(app, "/slow", 3))
+    codes = sorted(r.status_code for r in responses)
+    assert codes == [200, 200, 429]
+    rejected = next(r for r in responses if r.status_code == 429)
+    assert int(rejected.headers["Retry-After"]) >= 1
+
+
+def test_concurrency_queue_and_shedding():
+    app = make_app(RouteLimit(concurrency=1, queue=1, queue_timeout=5))
+    codes = sorted(r.status_code for r in asyncio.run(_get_many(app, "/slow", 3)))
+    # one runs, one waits its turn, the third finds the queue full
+    assert codes == [200, 200, 503]
+
+
+def test_queue_timeout_and_unlimited_routes():
+    app = make_app(RouteLimit(concurrency=1, queue=5, queue_timeout=0.01))
+    responses = asyncio.run(_get_many(app, "/slow", 2))
+    assert sorted(r.status_code for r in responses) == [200, 503]
+    assert "Retry-After" in next(r for r in responses if r.status_code == 503).headers
+
+    others = asyncio.run(_get_many(app, "/other", 5))
+    assert all(r.status_code == 200 for r in others)
+
+
+def test_slot_handed_over_at_timeout_is_not_leaked(monkeypatch):
+    from app.api import admission
+
+    state = admission._RouteState("/race", RouteLimit(concurrency=1, queue=1))
+
+    async def handoff_then_timeout(fut, timeout):
+        # The holder releases just as the wait times out (same loop tick)
+        state.release()
+        raise TimeoutError
+
+    async def main():
+        assert await state.acquire() is None
+        monkeypatch.setattr(admission.asyncio, "wait_for", handoff_then_timeout)
+        assert await state.acquire() is None  # admitted with the handed-over slot
+        monkeypatch.undo()
+        assert state.active == 1 and not state.waiters
+        state.release()
+        assert state.active == 0
+
+    asyncio.run(main())
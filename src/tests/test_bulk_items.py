@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api.routes_students import _bulk_items
+from app.core.config import settings
+
+
+def _request(content_type: str, chunks: list[bytes]) -> Request:
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/students/bulk",
+        "headers": [(b"content-type", content_type.encode())],
+    }
+    return Request(scope, receive)
+
+
+def _collect(request: Request) -> list:
+    async def main():
+        return [item async for item in _bulk_items(request)]
+
+    return asyncio.run(main())
+
+
+def test_ndjson_lines_split_across_chunks():
+    chunks = [b'{"a": 1}\n{"a"', b": 2}\n\n", b'  \n{"a": 3}']
+    items = _collect(_request("application/x-ndjson; charset=utf-8", chunks))
+    # Lines are yielded undecoded; blank lines and a missing final \n are fine
+    assert [json.loads(item) for item in items] == [{"a": 1}, {"a": 2}, {"a": 3}]
+
+
+def test_json_array():
+    body = json.dumps([{"a": 1}, "not an object"]).encode()
+    assert _collect(_request("application/json", [body])) == [
+        {"a": 1},
+        "not an object",
+    ]
+
+
+@pytest.mark.parametrize("body", [b"{not json", b'{"a": 1}'])
+def test_json_body_must_be_array(body):
+    with pytest.raises(HTTPException) as exc:
+        _collect(_request("application/json", [body]))
+    assert exc.value.status_code == 400
+
+
+def test_ndjson_line_split_over_many_chunks():
+    line = json.dumps({"a": "x" * 50}).encode()
+    chunks = [line[i : i + 7] for i in range(0, len(line), 7)] + [b"\n", line]
+    items = _collect(_request("application/x-ndjson", chunks))
+    assert items == [line, line]
+
+
+@pytest.mark.parametrize(
+    "content_type, chunks",
+    [
+        ("application/json", [b"[" + b" " * 30, b" " * 30 + b"]"]),
+        ("application/x-ndjson", [b"{}\n" + b" " * 30, b" " * 30 + b"{}\n"]),
+    ],
+)
+def test_body_over_limit_is_413(monkeypatch, content_type, chunks):
+    monkeypatch.setattr(settings, "BULK_MAX_JSON_BYTES", 50)
+    with pytest.raises(HTTPException) as exc:
+        _collect(_request(content_type, chunks))
+    assert exc.value.status_code == 413
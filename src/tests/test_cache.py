@@ -0,0 +1,81 @@
+from app.core.cache import TTLCache
+
+
+def test_lru_eviction():
+    cache = TTLCache("test_lru", maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    assert cache.get(1) == "a"  # 2 is now least recently used
+    cache.set(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a"
+    assert cache.get(3) == "c"
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache("test_ttl", maxsize=10, ttl=5)
+    cache.set("k", "v")
+    now[0] += 4
+    assert cache.get("k") == "v"
+    now[0] += 2
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_invalidate_and_disabled():
+    cache = TTLCache("test_inv", maxsize=10, ttl=60)
+    cache.set(1, "a")
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+    off = TTLCache("test_off", maxsize=0, ttl=60)
+    off.set(1, "a")
+    assert off.get(1) is None
+
+
+def test_entries_gauge_tracks_size():
+    from prometheus_client import REGISTRY
+
+    def entries():
+        return REGISTRY.get_sample_value("cache_entries", {"cache": "test_gauge"})
+
+    cache = TTLCache("test_gauge", maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.set(3, "c")
+    assert entries() == 2
+    cache.invalidate(3)
+    assert entries() == 1
+    cache.clear()
+    assert entries() == 0
+
+
+def test_set_skipped_after_invalidation():
+    cache = TTLCache("test_gen", maxsize=10, ttl=60)
+    generation = cache.generation
+    cache.invalidate(1)  # handled while the caller was reading key 1
+    cache.set(1, "stale", generation)
+    assert cache.get(1) is None
+
+    cache.set(1, "fresh", cache.generation)
+    assert cache.get(1) == "fresh"
+
+
+def test_read_racing_an_update_is_not_cached():
+    from types import SimpleNamespace
+
+    from app.core.cache import student_cache
+    from app.services import student_service
+
+    stale = SimpleNamespace(id=7, email="a@b.example")
+
+    class Db:
+        def execute(self, stmt):
+            # The update commits and its NOTIFY is handled mid-read
+            student_service.invalidate_cached("7")
+            return SimpleNamespace(first=lambda: stale)
+
+    assert student_service.get_student(Db(), 7) is stale
+    assert student_cache.get(7) is None
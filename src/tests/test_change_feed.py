@@ -0,0 +1,100 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy.engine.result import result_tuple
+
+from app.core.listener import PgListener
+from app.services.change_feed import (
+    CHANNEL,
+    ChangeFeed,
+    notify_event,
+    resync_event,
+    row_event,
+)
+from app.services.student_service import CHANGE_COLUMNS
+
+PAYLOAD = json.dumps(
+    {
+        "id": 7,
+        "op": "update",
+        "updated_at": "2026-01-02T03:04:05.5+00:00",
+        "resume": 1234,
+        "student": {
+            "id": 7,
+            "age": None,
+            "email": "a@b.example",
+            "phone": None,
+            "address": None,
+            "last_name": "B",
+            "first_name": "A",
+            "created_at": "2026-01-01T00:00:00+00:00",
+            "updated_at": "2026-01-02T03:04:05.5+00:00",
+        },
+    }
+)
+
+
+def test_notify_event_matches_api_encoding():
+    event = notify_event(PAYLOAD).decode()
+    head, data = event.split("data: ")
+    assert head == "id: 1234\nevent: update\n"
+    assert event.endswith("\n\n")
+    change = json.loads(data)
+    assert list(change["student"])[:3] == ["first_name", "last_name", "email"]
+    assert change["student"]["created_at"] == "2026-01-01T00:00:00Z"
+
+
+def _row(change_xid: int | None):
+    Row = result_tuple([c.name for c in CHANGE_COLUMNS])
+    values = {
+        **json.loads(PAYLOAD)["student"],
+        "created_at": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        "updated_at": datetime(2026, 1, 2, tzinfo=timezone.utc),
+        "change_xid": change_xid,
+    }
+    return Row([values[c.name] for c in CHANGE_COLUMNS])
+
+
+def test_row_event_resume_token():
+    def event_id(change_xid, floor):
+        return row_event(_row(change_xid), floor).split(b"\n")[0]
+
+    # Never past the row itself, nor past what may still be queued (floor)
+    assert event_id(500, 900) == b"id: 500"
+    assert event_id(950, 900) == b"id: 900"
+    assert event_id(None, 900) == b"id: 900"  # written before V6
+
+    data = json.loads(row_event(_row(1), 2).split(b"data: ")[1])
+    assert data["op"] == "update"
+    assert list(data["student"])[:3] == ["first_name", "last_name", "email"]
+    assert "change_xid" not in data["student"]
+
+
+def test_fan_out_and_lagging_subscriber():
+    async def main():
+        listener = PgListener("postgresql://unused")
+        feed = ChangeFeed(queue_size=2)
+        feed.start(listener)
+        fast, slow = feed.subscribe(), feed.subscribe()
+
+        for _ in range(3):
+            listener._dispatch(CHANNEL, PAYLOAD)
+            await asyncio.sleep(0)  # let call_soon_threadsafe run
+            if not fast.empty():
+                await fast.get()
+
+        assert slow.get_nowait() == "lagging"  # dropped, must resume
+        assert not feed.full and len(feed._subscribers) == 1
+
+        feed.stop()
+        assert fast.get_nowait() == "shutdown"
+
+    asyncio.run(main())
+
+
+def test_resync_event_keeps_last_event_id():
+    event = resync_event("lagging")
+    assert event.startswith(b"event: resync\n")
+    assert b"id:" not in event  # the client resumes from its last change
+    assert json.loads(event.split(b"data: ")[1]) == {"reason": "lagging"}
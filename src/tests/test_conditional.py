@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from starlette.requests import Request
+
+from app.api.conditional import (
+    if_match_versions,
+    not_modified,
+    page_etag,
+    student_etag,
+)
+
+UPDATED_AT = datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+ROW = SimpleNamespace(id=7, updated_at=UPDATED_AT)
+
+
+def _request(**headers: str) -> Request:
+    raw = [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "headers": raw})
+
+
+def test_student_etag_round_trips_through_if_match():
+    etag = student_etag(ROW)
+    assert etag == '"7-1767323045123456"'
+    assert if_match_versions(_request(if_match=etag), 7) == [UPDATED_AT]
+
+
+def test_if_match_versions():
+    assert if_match_versions(_request(), 7) is None
+    assert if_match_versions(_request(if_match=" * "), 7) is None
+
+    other = student_etag(SimpleNamespace(id=8, updated_at=UPDATED_AT))
+    header = f'W/{student_etag(ROW)}, {other}, "7-abc", "7", garbage'
+    # Weak tags, other students' tags and malformed versions never match
+    assert if_match_versions(_request(if_match=header), 7) == []
+
+    header = f'"7-1", {student_etag(ROW)}'
+    assert len(if_match_versions(_request(if_match=header), 7)) == 2
+
+
+def test_not_modified_uses_weak_comparison():
+    etag = page_etag([ROW])
+    assert etag.startswith('W/"')
+    assert not_modified(_request(), etag) is None
+    assert not_modified(_request(if_none_match='"nope"'), etag) is None
+    for header in (etag, etag.removeprefix("W/"), f'"x", {etag}', "*"):
+        response = not_modified(_request(if_none_match=header), etag)
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
@@ -0,0 +1,97 @@
+import asyncio
+
+from app.services.group_commit import GroupCommitter
+
+
+def test_batches_and_routes_results():
+    batches = []
+
+    async def flush(items):
+        batches.append(list(items))
+        await asyncio.sleep(0)
+        return [i * 10 for i in items]
+
+    async def main():
+        gc = GroupCommitter("test_batches", flush, max_batch=4, linger=0.01)
+        gc.start()
+        results = await asyncio.gather(*(gc.submit(i) for i in range(10)))
+        await gc.stop()
+        return results
+
+    assert asyncio.run(main()) == [i * 10 for i in range(10)]
+    assert sorted(i for b in batches for i in b) == list(range(10))
+    assert max(len(b) for b in batches) <= 4
+    assert len(batches) < 10
+
+
+def test_flush_error_reaches_every_caller():
+    async def flush(items):
+        raise RuntimeError("db down")
+
+    async def main():
+        gc = GroupCommitter("test_errors", flush, max_batch=5, linger=0.01)
+        gc.start()
+        results = await asyncio.gather(
+            *(gc.submit(i) for i in range(3)), return_exceptions=True
+        )
+        await gc.stop()
+        return results
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+
+
+def test_stop_times_out_and_fails_pending():
+    release = asyncio.Event()
+
+    async def flush(items):
+        await release.wait()  # a database that stopped answering
+        return items
+
+    async def main():
+        gc = GroupCommitter("test_stop", flush, max_batch=2, linger=0)
+        gc.start()
+        calls = [asyncio.ensure_future(gc.submit(i)) for i in range(5)]
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(gc.stop(timeout=0.05), 1)
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_register_takes_no_session_in_queue_mode(monkeypatch):
+    from contextlib import asynccontextmanager
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api import routes_public
+
+    def no_session():
+        raise AssertionError("group commit must not open a request session")
+
+    async def flush(payloads):
+        now = "2024-01-01T00:00:00Z"
+        return [
+            {"id": 1, **p.model_dump(), "created_at": now, "updated_at": now}
+            for p in payloads
+        ]
+
+    monkeypatch.setattr(routes_public, "db_session", no_session)
+    monkeypatch.setattr(routes_public.register_queue, "_flush", flush)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        routes_public.register_queue.start(linger=0)
+        yield
+        await routes_public.register_queue.stop(timeout=1)
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(routes_public.router)
+    with TestClient(app) as client:
+        resp = client.post(
+            "/public/register",
+            json={"first_name": "Ann", "last_name": "Lee", "email": "ann@example.com"},
+        )
+    assert resp.status_code == 201, resp.text
+    assert resp.json()["id"] == 1
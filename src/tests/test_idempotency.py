@@ -0,0 +1,112 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.api.idempotency import IdempotencyMiddleware
+from app.core.cache import TTLCache
+
+
+def make_app():
+    calls = []
+    app = FastAPI()
+    app.add_middleware(
+        IdempotencyMiddleware,
+        routes={("POST", "/items")},
+        store=TTLCache("test_idempotency", maxsize=100, ttl=60),
+    )
+
+    @app.post("/items")
+    async def create(item: dict):
+        calls.append(item)
+        await asyncio.sleep(0.02)
+        response = JSONResponse(
+            {"n": len(calls), **item}, status_code=item.get("status", 201)
+        )
+        response.set_cookie("session", f"s{len(calls)}")
+        return response
+
+    return app, calls
+
+
+async def _post(app, *requests):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+        return await asyncio.gather(
+            *(
+                c.post("/items", json=body, headers=headers)
+                for body, headers in requests
+            )
+        )
+
+
+def test_retry_is_replayed():
+    app, calls = make_app()
+    key = {"Idempotency-Key": "abc"}
+    (first,) = asyncio.run(_post(app, ({"a": 1}, key)))
+    (retry,) = asyncio.run(_post(app, ({"a": 1}, key)))
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 1
+
+
+def test_key_reuse_with_other_body_or_caller():
+    app, calls = make_app()
+    asyncio.run(_post(app, ({"a": 1}, {"Idempotency-Key": "k"})))
+    (other_body,) = asyncio.run(_post(app, ({"a": 2}, {"Idempotency-Key": "k"})))
+    assert other_body.status_code == 422
+
+    (other_caller,) = asyncio.run(
+        _post(app, ({"a": 1}, {"Idempotency-Key": "k", "X-API-Key": "x"}))
+    )
+    assert other_caller.status_code == 201
+    assert "idempotent-replayed" not in other_caller.headers
+    assert len(calls) == 2
+
+
+def test_concurrent_duplicates_are_coalesced():
+    app, calls = make_app()
+    req = ({"a": 1}, {"Idempotency-Key": "same"})
+    responses = asyncio.run(_post(app, req, req, req))
+    assert len(calls) == 1
+    assert {r.json()["n"] for r in responses} == {1}
+
+    # No key: nothing is deduplicated
+    asyncio.run(_post(app, ({"a": 1}, {}), ({"a": 1}, {})))
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("status", [401, 408, 429, 503])
+def test_transient_outcomes_are_not_stored(status):
+    app, calls = make_app()
+    req = ({"status": status}, {"Idempotency-Key": "t"})
+    responses = asyncio.run(_post(app, req, req))
+    (retry,) = asyncio.run(_post(app, req))
+    # The concurrent duplicate isn't handed the first outcome, it runs itself
+    assert [r.status_code for r in responses] == [status, status]
+    assert "idempotent-replayed" not in retry.headers
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("status", [200, 409, 422])
+def test_final_outcomes_are_stored(status):
+    app, calls = make_app()
+    req = ({"status": status}, {"Idempotency-Key": "f"})
+    asyncio.run(_post(app, req))
+    (retry,) = asyncio.run(_post(app, req))
+    assert retry.status_code == status
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 1
+
+
+def test_set_cookie_is_not_replayed():
+    app, _ = make_app()
+    key = {"Idempotency-Key": "c"}
+    (first,) = asyncio.run(_post(app, ({"a": 1}, key)))
+    (retry,) = asyncio.run(_post(app, ({"a": 1}, key)))
+    assert first.headers["set-cookie"].startswith("session=s1")
+    assert "set-cookie" not in retry.headers
+    assert retry.json() == first.json()
@@ -0,0 +1,37 @@
+import pytest
+
+from admin_cli.importer import COLUMNS, column_positions, normalize_row
+
+
+def test_column_positions():
+    header = [" email", "last_name", "age", "first_name "]
+    assert column_positions(header) == [3, 1, 0, None, 2, None]
+    assert len(column_positions(list(COLUMNS))) == len(COLUMNS)
+
+
+@pytest.mark.parametrize("header", [None, [], ["first_name", "email"]])
+def test_column_positions_missing_required(header):
+    with pytest.raises(ValueError, match="missing column"):
+        column_positions(header)
+
+
+def test_normalize_row():
+    row = ["  Ann ", "Lee", " Ann.Lee@Example.COM ", "", " 42 ", None]
+    assert normalize_row(row) == ("Ann", "Lee", "ann.lee@example.com", None, 42, None)
+
+
+@pytest.mark.parametrize(
+    "row, reason",
+    [
+        (["", "Lee", "a@b.example", None, None, None], "first_name is required"),
+        (["Ann", "Lee", "  ", None, None, None], "email is required"),
+        (["A" * 81, "Lee", "a@b.example", None, None, None], "first_name longer"),
+        (["Ann", "Lee", "a@localhost", None, None, None], "invalid email"),
+        (["Ann", "Lee", "@b.example", None, None, None], "invalid email"),
+        (["Ann", "Lee", "a@b.example", None, "forty", None], "not a number"),
+        (["Ann", "Lee", "a@b.example", None, "131", None], "out of range"),
+    ],
+)
+def test_normalize_row_rejects(row, reason):
+    with pytest.raises(ValueError, match=reason):
+        normalize_row(row)
@@ -0,0 +1,153 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from sqlalchemy.engine.result import result_tuple
+
+from app.api.deps import get_db, get_read_db
+from app.api.routes_students import router
+from app.core.config import settings
+from app.schemas.student import LOOKUP_MAX_ITEMS, StudentLookup
+from app.services import student_service
+from app.services.student_service import OUT_COLUMNS
+
+Row = result_tuple([c.name for c in OUT_COLUMNS])
+NOW = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+def _row(i: int):
+    values = {
+        "id": i,
+        "first_name": "F",
+        "last_name": "L",
+        "email": f"s{i}@example.com",
+        "created_at": NOW,
+        "updated_at": NOW,
+    }
+    return Row([values.get(c.name) for c in OUT_COLUMNS])
+
+
+STORED = {i: _row(i) for i in (1, 2, 3)}
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {},
+        {"ids": [1], "emails": ["a@b.example"]},
+        {"ids": None, "emails": None},
+        {"ids": list(range(LOOKUP_MAX_ITEMS + 1))},
+    ],
+)
+def test_lookup_needs_exactly_one_key(body):
+    with pytest.raises(ValidationError):
+        StudentLookup.model_validate(body)
+
+
+def test_lookup_accepts_either_key():
+    assert StudentLookup(ids=[]).ids == []
+    assert StudentLookup(emails=["a@b.example"]).emails == ["a@b.example"]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+
+    def get_students(db, ids):
+        calls.append(ids)
+        return {i: STORED[i] for i in ids if i in STORED}
+
+    def get_students_by_email(db, emails):
+        calls.append(emails)
+        by_email = {row.email: row for row in STORED.values()}
+        return {e: by_email[e] for e in emails if e in by_email}
+
+    monkeypatch.setattr(student_service, "get_students", get_students)
+    monkeypatch.setattr(student_service, "get_students_by_email", get_students_by_email)
+
+    async def no_db():
+        yield None
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_read_db] = no_db
+    client = TestClient(app)
+    client.calls = calls
+    return client
+
+
+def test_lookup_keeps_request_order_and_lists_missing(client):
+    r = client.post("/students/lookup", json={"ids": [3, 9, 1, 3, 2, 9]})
+    assert r.status_code == 200
+    body = r.json()
+    assert [s["id"] for s in body["students"]] == [3, 1, 2]
+    assert body["missing"] == [9]
+    assert client.calls == [[3, 9, 1, 2]]  # duplicates collapsed before the query
+    assert body["students"][0]["created_at"] == "2026-01-02T03:04:05Z"
+
+
+def test_lookup_by_email_normalizes(client):
+    emails = [
+        " S2@Example.com",
+        "nobody@example.com",
+        "s2@example.com",
+        "S1@EXAMPLE.COM",
+    ]
+    body = client.post("/students/lookup", json={"emails": emails}).json()
+    assert [s["id"] for s in body["students"]] == [2, 1]
+    assert body["missing"] == ["nobody@example.com"]
+    assert client.calls == [["s2@example.com", "nobody@example.com", "s1@example.com"]]
+
+
+def test_lookup_rejects_both_keys(client):
+    r = client.post("/students/lookup", json={"ids": [1], "emails": ["a@b.example"]})
+    assert r.status_code == 422
+    assert client.calls == []
+
+
+class _FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class _FakeDb:
+    """Answers any statement with one row shaped like its SELECT list."""
+
+    def __init__(self, values: dict):
+        self.values = values
+
+    def execute(self, stmt):
+        keys = [c.key for c in stmt.selected_columns]
+        return _FakeResult(result_tuple(keys)([self.values.get(k) for k in keys]))
+
+    def commit(self):
+        pass
+
+
+def test_lookup_after_patch_has_the_student_out_shape():
+    stored = STORED[1]._asdict()
+    db = _FakeDb({**stored, "first_name": "Patched"})
+
+    async def fake_db():
+        yield db
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = fake_db
+    app.dependency_overrides[get_read_db] = fake_db
+    client = TestClient(app)
+
+    admin = {"X-API-Key": settings.ADMIN_API_KEY}
+    r = client.patch("/students/1", json={"first_name": "Patched"}, headers=admin)
+    assert r.status_code == 200, r.text
+
+    # Served from the row the PATCH cached
+    db.values = {}
+    (student,) = client.post("/students/lookup", json={"ids": [1]}).json()["students"]
+    assert list(student) == [c.name for c in OUT_COLUMNS]
+    assert student["first_name"] == "Patched"
@@ -0,0 +1,55 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.pagination import cursor_id, cursor_values, decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    token = encode_cursor({"id": 12345})
+    assert "=" not in token
+    assert decode_cursor(token) == {"id": 12345}
+    assert cursor_id(token) == 12345
+
+
+BAD_ID_CURSORS = [
+    "zzz",
+    "W10",
+    encode_cursor({"id": "1"}),
+    encode_cursor({"id": "abc"}),
+    encode_cursor({"id": None}),
+]
+
+
+@pytest.mark.parametrize("token", BAD_ID_CURSORS)
+def test_bad_cursor_is_400(token):
+    with pytest.raises(HTTPException) as exc:
+        cursor_id(token)
+    assert exc.value.status_code == 400
+
+
+def test_cursor_values():
+    token = encode_cursor({"last": "smith", "first": "ann", "id": 7})
+    assert cursor_values(token, last=str, first=str, id=int) == ("smith", "ann", 7)
+    assert cursor_values(None, id=int) is None
+    for bad in (encode_cursor({"last": "smith", "id": 7}), encode_cursor({"id": 7})):
+        with pytest.raises(HTTPException):
+            cursor_values(bad, last=str, first=str, id=int)
+
+
+@pytest.mark.parametrize("token", BAD_ID_CURSORS)
+def test_cli_rejects_bad_cursor(token):
+    typer = pytest.importorskip("typer")
+    from admin_cli.cli import _cursor_id
+
+    with pytest.raises(typer.Exit):
+        _cursor_id(token)
+    assert _cursor_id(encode_cursor({"id": 7})) == 7
+
+
+def test_cli_cursor_matches_api():
+    pytest.importorskip("rich")
+    from admin_cli import util
+
+    values = {"last": "smith", "first": "ann", "id": 7}
+    assert util.encode_cursor(values) == encode_cursor(values)
+    assert util.cursor_values(encode_cursor(values), id=int) == (7,)
@@ -0,0 +1,41 @@
+import threading
+
+from app.core import metrics
+from app.core.pool import InstrumentedQueuePool
+
+
+class _Conn:
+    def close(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def _waiting(name: str) -> float:
+    return metrics.DB_POOL_WAITING.labels(pool=name)._value.get()
+
+
+def test_waiting_counts_only_checkouts_of_an_exhausted_pool():
+    pool = InstrumentedQueuePool(_Conn, pool_size=1, max_overflow=1, timeout=5)
+    pool.metrics_name = "test_waiting"
+
+    first, second = pool.connect(), pool.connect()
+    assert _waiting("test_waiting") == 0
+
+    got_third = threading.Event()
+
+    def third():
+        pool.connect().close()
+        got_third.set()
+
+    t = threading.Thread(target=third)
+    t.start()
+    assert not got_third.wait(0.2)
+    assert _waiting("test_waiting") == 1
+
+    first.close()
+    t.join(5)
+    assert got_third.is_set()
+    assert _waiting("test_waiting") == 0
+    second.close()
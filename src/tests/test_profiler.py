@@ -0,0 +1,68 @@
+import threading
+import time
+
+from app.core.profiler import Sampler
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_sees_busy_thread_and_formats():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    sampler = Sampler(0.002)
+    assert sampler.start()
+    assert not Sampler(0.002).start()  # one at a time
+    time.sleep(0.1)
+    profile = sampler.stop()
+    stop.set()
+    worker.join()
+
+    busy = [n for stack, n in profile.stacks if stack[-1].endswith(":busy_loop")]
+    assert sum(busy) > 5
+    assert ":busy_loop " in profile.collapsed()
+
+    doc = profile.speedscope()
+    (sampled,) = doc["profiles"]
+    assert len(sampled["samples"]) == len(sampled["weights"]) == len(profile.stacks)
+    names = [f["name"] for f in doc["shared"]["frames"]]
+    assert any(name.endswith(":busy_loop") for name in names)
+
+    # The lock is released again
+    again = Sampler(0.002)
+    assert again.start()
+    again.stop()
+
+
+def test_x_profile_returns_the_profile_in_the_response():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api.profiling import ProfileRequestMiddleware
+    from app.core.config import settings
+
+    app = FastAPI()
+    app.add_middleware(ProfileRequestMiddleware, interval=0.001)
+
+    @app.get("/work", status_code=202)
+    async def work():
+        deadline = time.monotonic() + 0.05
+        while time.monotonic() < deadline:
+            sum(range(1000))
+        return {"done": True}
+
+    admin = {"X-API-Key": settings.ADMIN_API_KEY}
+    with TestClient(app) as client:
+        assert client.get("/work", headers={"X-Profile": "1"}).json() == {"done": True}
+
+        resp = client.get("/work", headers={"X-Profile": "1", **admin})
+        assert resp.status_code == 200
+        assert resp.headers["X-Profile-Status"] == "202"
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert ".work " in resp.text
+
+        resp = client.get("/work", headers={"X-Profile": "speedscope", **admin})
+        assert resp.json()["profiles"][0]["samples"]
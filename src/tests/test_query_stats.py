@@ -0,0 +1,61 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.api.query_stats import QueryStatsMiddleware
+from app.core.query_stats import (
+    instrument_queries,
+    normalize,
+    statement_label,
+)
+
+
+def test_normalize_collapses_literals_and_value_lists():
+    insert = "INSERT INTO students (first_name, email) VALUES "
+    two = normalize(insert + "(%(f_0)s, %(e_0)s), (%(f_1)s, %(e_1)s)")
+    three = normalize(insert + "(%(f_0)s, %(e_0)s), (%(f_1)s, %(e_1)s), ('x', 'y')")
+    assert two == three == insert + "(...), ..."
+    assert normalize("SELECT * FROM t WHERE id IN (1, 2, 3) AND x = 'a''b'") == (
+        "SELECT * FROM t WHERE id IN (?, ...) AND x = ?"
+    )
+
+
+def test_statement_label_names_the_write_in_a_cte():
+    label = statement_label(
+        "WITH changed AS (UPDATE students SET age=%(age)s WHERE students.id = "
+        "%(id)s RETURNING students.id) SELECT changed.id FROM changed"
+    )
+    assert label.startswith("update students:")
+    assert statement_label("SELECT students.id FROM students").startswith(
+        "select students:"
+    )
+
+
+def test_queries_counted_per_route():
+    engine = create_engine("sqlite://")
+    instrument_queries(engine, "test")
+
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/things/{n}")
+    def things(n: int):
+        with engine.connect() as conn:
+            for _ in range(n):
+                conn.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    labels = {"method": "GET", "handler": "/things/{n}"}
+    with TestClient(app) as client:
+        assert client.get("/things/3").status_code == 200
+        assert client.get("/missing").status_code == 404
+
+    assert REGISTRY.get_sample_value("db_queries_per_request_sum", labels) == 3
+    assert REGISTRY.get_sample_value("db_queries_per_request_count", labels) == 1
+    assert (
+        REGISTRY.get_sample_value(
+            "db_queries_per_request_count", {"method": "GET", "handler": "/missing"}
+        )
+        is None
+    )
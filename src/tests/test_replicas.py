@@ -0,0 +1,89 @@
+import time
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from app.api.read_your_writes import (
+    READ_PRIMARY_COOKIE,
+    READ_PRIMARY_HEADER,
+    ReadYourWritesMiddleware,
+    pin_primary,
+    reads_pinned,
+)
+from app.core.replicas import ReplicaPool
+
+
+def _engine(port: int):
+    return create_engine(
+        f"postgresql+psycopg://u:p@127.0.0.1:{port}/db",
+        connect_args={"connect_timeout": 1},
+    )
+
+
+def test_unreachable_replica_is_skipped():
+    pool = ReplicaPool([_engine(1), _engine(2)], retry_after=60)
+    assert sorted(pool.pick() for _ in range(4)) == [0, 0, 1, 1]
+
+    with pytest.raises(OperationalError):
+        pool.engines[0].connect()
+    assert pool.healthy() == [1]
+    assert {pool.pick() for _ in range(4)} == {1}
+
+    pool.mark_down(1)
+    assert pool.pick() is None  # all down: callers use the primary
+
+    pool.down_until[0] = time.monotonic()  # retry_after elapsed
+    assert pool.pick() == 0
+
+
+def test_least_latency_skips_down_replicas():
+    pool = ReplicaPool([_engine(1), _engine(2)], strategy="least_latency")
+    pool.latency[:] = [0.001, 0.5]
+    assert pool.pick() == 0
+    pool.mark_down(0)
+    assert pool.pick() == 1
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post("/write")
+    def write(request: Request, status: int = 200):
+        pin_primary(request)
+        # A Response returned directly, not the injected one
+        return Response(status_code=status)
+
+    @app.get("/read")
+    def read(request: Request):
+        return {"pinned": reads_pinned(request)}
+
+    return app
+
+
+def test_write_pins_reads_by_cookie_or_header():
+    client = TestClient(_app())
+    assert client.get("/read").json() == {"pinned": False}
+
+    r = client.post("/write")
+    assert READ_PRIMARY_COOKIE in r.cookies
+    until = r.headers[READ_PRIMARY_HEADER]
+    assert float(until) > time.time()
+    assert client.get("/read").json() == {"pinned": True}
+
+    # Clients without a cookie jar echo the header instead
+    fresh = TestClient(_app())
+    assert fresh.get("/read").json() == {"pinned": False}
+    r = fresh.get("/read", headers={READ_PRIMARY_HEADER: until})
+    assert r.json() == {"pinned": True}
+    r = fresh.get("/read", headers={READ_PRIMARY_HEADER: "not-a-time"})
+    assert r.json() == {"pinned": False}
+
+
+def test_failed_write_does_not_pin():
+    r = TestClient(_app()).post("/write", params={"status": 409})
+    assert READ_PRIMARY_HEADER not in r.headers
+    assert "set-cookie" not in r.headers
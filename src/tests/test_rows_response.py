@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_model_field
+from sqlalchemy.engine.result import result_tuple
+
+from app.api.routes_students import RowsResponse
+from app.schemas.student import StudentOut
+from app.services.student_service import OUT_COLUMNS
+
+Row = result_tuple([c.name for c in OUT_COLUMNS])
+
+TIMESTAMPS = [
+    datetime(2026, 1, 2, 3, 4, 5),  # naive
+    datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+    datetime(2026, 1, 2, 3, 4, 5, 500000, tzinfo=timezone.utc),
+    datetime(2026, 1, 2, 3, 4, 5, 7, tzinfo=timezone(timedelta(hours=-5))),
+]
+
+
+def _row(i: int, created_at: datetime, updated_at: datetime):
+    values = {
+        "id": i,
+        "first_name": "Zoë",
+        "last_name": 'O"Brien',
+        "email": f"s{i}@example.com",
+        "phone": None if i % 2 else "+1 555 0100",
+        "age": None if i % 3 else 20 + i,
+        "address": "1 Main St\nApt 2",
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
+    return Row([values[c.name] for c in OUT_COLUMNS])
+
+
+def test_rows_response_matches_response_model():
+    rows = [
+        _row(i, created_at, TIMESTAMPS[-1 - i])
+        for i, created_at in enumerate(TIMESTAMPS)
+    ]
+    field = create_model_field("Response_list", list[StudentOut], mode="serialization")
+    value, errors = field.validate(rows, {}, loc=("response",))
+    assert not errors
+    expected = JSONResponse(field.serialize(value, mode="json", by_alias=True)).body
+
+    assert RowsResponse([row._asdict() for row in rows]).body == expected
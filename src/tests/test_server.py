@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+# gunicorn is POSIX-only
+pytest.importorskip("gunicorn.app.base")
+
+from app.server import cpu_limit, prepare_multiprocess_dir
+
+
+@pytest.fixture
+def eight_cpus(monkeypatch):
+    monkeypatch.setattr(
+        os, "sched_getaffinity", lambda pid: set(range(8)), raising=False
+    )
+
+
+def _write(root, name: str, text: str) -> None:
+    path = root / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text + "\n")
+
+
+@pytest.mark.parametrize(
+    "files, expected",
+    [
+        ({"cpu.max": "250000 100000"}, 3),  # 2.5 CPUs, rounded up
+        ({"cpu.max": "50000 100000"}, 1),
+        ({"cpu.max": "max 100000"}, 8),
+        ({"cpu.max": "1600000 100000"}, 8),  # never above the affinity mask
+        ({"cpu/cpu.cfs_quota_us": "200000", "cpu/cpu.cfs_period_us": "100000"}, 2),
+        ({"cpu/cpu.cfs_quota_us": "-1", "cpu/cpu.cfs_period_us": "100000"}, 8),
+        ({"cpu.max": "garbage"}, 8),
+        ({}, 8),
+    ],
+    ids=[
+        "v2-quota",
+        "v2-below-one",
+        "v2-max",
+        "v2-above-affinity",
+        "v1-quota",
+        "v1-unlimited",
+        "v2-malformed",
+        "missing",
+    ],
+)
+def test_cpu_limit(tmp_path, eight_cpus, files, expected):
+    for name, text in files.items():
+        _write(tmp_path, name, text)
+    assert cpu_limit(tmp_path) == expected
+
+
+def test_multiprocess_dir_is_wiped(tmp_path, monkeypatch):
+    path = tmp_path / "prom"
+    path.mkdir()
+    (path / "counter_123.db").write_bytes(b"stale")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(path))
+
+    assert prepare_multiprocess_dir() == str(path)
+    assert path.is_dir() and not any(path.iterdir())
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1]
+
+# Self time of our own modules (third-party imports excluded). Today it is
+# ~80 ms; creating engines, reading settings or connecting at import would
+# blow well past this.
+APP_IMPORT_BUDGET_S = 0.5
+
+CHECK = """
+import app.main
+from app.core import config, database
+assert config.get_settings.cache_info().currsize == 0, "Settings() loaded at import"
+assert database._database is None, "engines built at import"
+"""
+
+
+def test_import_is_side_effect_free_and_fast():
+    env = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+    env["PYTHONPATH"] = str(SRC)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHECK],
+        check=False,
+        cwd=SRC,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    own = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        if (name == "app" or name.startswith("app.")) and self_us.strip().isdigit():
+            own += int(self_us)
+    assert 0 < own / 1e6 < APP_IMPORT_BUDGET_S